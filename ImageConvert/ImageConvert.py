@@ -9,10 +9,15 @@
 
 import os
 import sys
+import json
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QPushButton, QLabel, QLineEdit, 
                             QComboBox, QCheckBox, QTextEdit, QFileDialog,
-                            QFrame, QDialog, QProgressBar)
+                            QFrame, QDialog, QProgressBar, QSpinBox)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QIcon, QColor
 from PyQt6.QtWidgets import QGraphicsDropShadowEffect
@@ -100,6 +105,263 @@ class CustomMessageBox(QDialog):
         layout.addWidget(content_frame)
 
 
+# 各源格式对应的扩展名
+SOURCE_EXTENSIONS = {
+    'png': ('.png',),
+    'jpeg': ('.jpg', '.jpeg'),
+    'jpg': ('.jpg', '.jpeg'),
+    'bmp': ('.bmp',),
+    'gif': ('.gif',),
+    'tiff': ('.tiff',),
+    'ico': ('.ico',),
+    'webp': ('.webp',)
+}
+# 自动检测模式下支持的全部扩展名
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.webp', '.ico'}
+
+
+def _scan_dir(path, files):
+    """用 os.scandir 递归收集目录中的图片，顺序与 os.walk 相同"""
+    subdirs = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif (os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+                          and entry.is_file()):
+                        files.append(entry.path)
+                except OSError:
+                    continue
+    except OSError:
+        return
+    for subdir in subdirs:
+        _scan_dir(subdir, files)
+
+
+def scan_images(source_paths):
+    """一次遍历生成所选位置中全部受支持图片的清单"""
+    files = []
+    for source_path in source_paths:
+        if os.path.isfile(source_path):
+            if os.path.splitext(source_path)[1].lower() in IMAGE_EXTENSIONS:
+                files.append(source_path)
+        elif os.path.isdir(source_path):
+            _scan_dir(source_path, files)
+    return files
+
+
+def filter_by_format(files, source_format):
+    """按源格式筛选清单，source_format 为 None 表示自动检测"""
+    if source_format is None:
+        return list(files)
+    valid_extensions = SOURCE_EXTENSIONS.get(source_format, ())
+    return [f for f in files if os.path.splitext(f)[1].lower() in valid_extensions]
+
+
+# 缩放模式：fit 按最长边等比缩小，fill 缩小后居中裁剪为正方形
+RESIZE_MODES = ('fit', 'fill')
+# 先按整数倍快速缩小，剩余部分再用 LANCZOS 重采样；3.0 时与完整重采样几乎无差别
+RESIZE_REDUCING_GAP = 3.0
+
+
+# 估算解码后占用超过该值的图片视为大图，需要向内存预算申请额度
+LARGE_IMAGE_BYTES = 256 * 1024 * 1024
+# 默认内存预算（MB），所有转换进程中同时处理的大图合计不超过该值
+MEMORY_BUDGET_MB = 2048
+# 转换时允许的最大像素数，替换 Pillow 默认约 8900 万像素的解压炸弹限制；
+# 超过该限制两倍的图片会直接报错，None 表示不限制，由内存预算控制大图的并发
+MAX_IMAGE_PIXELS = None
+
+
+class MemoryBudget:
+    """跨进程共享的内存预算，大图按估算的内存占用申请额度，额度不足时等待"""
+
+    def __init__(self, limit_mb=MEMORY_BUDGET_MB, context=multiprocessing):
+        self.limit = limit_mb * 1024 * 1024
+        # 同步对象须与进程池使用同一种启动方式创建
+        self._used = context.Value('q', 0, lock=False)
+        self._condition = context.Condition()
+
+    @contextmanager
+    def reserve(self, size):
+        """申请 size 字节的额度；超过总预算的图片等其他大图全部完成后单独处理"""
+        size = min(size, self.limit)
+        with self._condition:
+            self._condition.wait_for(lambda: self._used.value + size <= self.limit)
+            self._used.value += size
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._used.value -= size
+                self._condition.notify_all()
+
+
+# 进程池中每个子进程持有的内存预算，由 _init_pool 设置
+_memory_budget = None
+
+
+def _init_pool(memory_budget, max_image_pixels=MAX_IMAGE_PIXELS):
+    """进程池子进程的初始化函数，逐个转换时在当前进程中调用"""
+    global _memory_budget
+    _memory_budget = memory_budget
+    Image.MAX_IMAGE_PIXELS = max_image_pixels
+
+
+def estimate_memory(img, target_format):
+    """估算转换时的峰值内存：解码后的位图，加上转换出的一份 RGB 或同尺寸副本"""
+    width, height = img.size
+    output_bands = 3 if target_format in ('jpg', 'jpeg') else len(img.getbands())
+    return width * height * (len(img.getbands()) + output_bands)
+
+
+def flatten_alpha(img):
+    """把带透明通道的图片铺到白色背景上
+
+    直接以图片自身作遮罩，RGBA/LA 粘贴到 RGB 上也不会再转换出副本，
+    峰值内存只有原图加一张 RGB 背景，不再额外 split 出四个通道。
+    """
+    background = Image.new('RGB', img.size, (255, 255, 255))
+    background.paste(img, mask=img)
+    return background
+
+
+def draft_image(img, max_edge, mode='fit'):
+    """按缩放目标设置 JPEG 的 DCT 缩放解码，只修改解码尺寸，不会解码"""
+    width, height = img.size
+    scale = max_edge / (min(width, height) if mode == 'fill' else max(width, height))
+    if scale < 1:
+        img.draft(None, (math.ceil(width * scale), math.ceil(height * scale)))
+    return scale
+
+
+def resize_image(img, max_edge, mode='fit'):
+    """把图片缩小到最长边（fill 模式为正方形边长）不超过 max_edge，不会放大
+
+    必须在图片解码前调用：JPEG 会通过 draft 直接以 1/2、1/4、1/8 的 DCT 缩放解码，
+    不再先解出全尺寸位图。
+    """
+    if draft_image(img, max_edge, mode) >= 1:
+        return img
+
+    # draft 保证解码尺寸不小于请求尺寸，之后以解码后的实际尺寸为准
+    width, height = img.size
+    if mode == 'fill':
+        side = min(width, height)
+        left, top = (width - side) / 2, (height - side) / 2
+        return img.resize((max_edge, max_edge), Image.Resampling.LANCZOS,
+                          box=(left, top, left + side, top + side),
+                          reducing_gap=RESIZE_REDUCING_GAP)
+    scale = max_edge / max(width, height)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return img.resize(size, Image.Resampling.LANCZOS, reducing_gap=RESIZE_REDUCING_GAP)
+
+
+def convert_image(source_path, target_path, target_format, quality=95, max_edge=None, resize_mode='fit'):
+    """转换单个图片，供进程池调用，因此必须是模块级函数"""
+    with Image.open(source_path) as img:
+        if max_edge:
+            # 先确定解码尺寸，内存估算才准确
+            draft_image(img, max_edge, resize_mode)
+        cost = estimate_memory(img, target_format)
+        if _memory_budget is not None and cost >= LARGE_IMAGE_BYTES:
+            with _memory_budget.reserve(cost):
+                _convert_opened(img, target_path, target_format, quality, max_edge, resize_mode)
+        else:
+            _convert_opened(img, target_path, target_format, quality, max_edge, resize_mode)
+    return target_path
+
+
+def _convert_opened(img, target_path, target_format, quality, max_edge, resize_mode):
+    """解码、缩放并保存已打开的图片"""
+    if max_edge:
+        img = resize_image(img, max_edge, resize_mode)
+    if target_format == 'jpg' or target_format == 'jpeg':
+        # JPEG不支持透明通道，需要特殊处理
+        if img.mode in ('RGBA', 'LA'):
+            output = flatten_alpha(img)
+        else:
+            output = img.convert('RGB')
+        # 编码前释放原图位图，降低保存阶段的内存占用
+        if output is not img:
+            img.close()
+        output.save(target_path, quality=quality)
+    else:
+        img.save(target_path)
+
+
+def _path_key(path):
+    """用于比较的规范化路径"""
+    return os.path.normcase(os.path.abspath(path))
+
+
+class ConvertManifest:
+    """增量转换的旁路清单，记录每个源文件上次转换时的修改时间、大小和输出路径"""
+    FILENAME = '.imageconvert.json'
+
+    def __init__(self, folder, target_format, options):
+        self.path = os.path.join(folder, self.FILENAME)
+        self.options = options
+        self.data = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            pass
+        # 不同目标格式分开记录，互不影响
+        self.entries = self.data.setdefault(target_format, {})
+        self.targets = {_path_key(entry['target']): source for source, entry in self.entries.items()}
+        self._stamps = {}
+        self.dirty = False
+
+    def previous_target(self, source_path):
+        """上次转换时使用的输出路径"""
+        entry = self.entries.get(os.path.abspath(source_path))
+        return entry['target'] if entry else None
+
+    def owner(self, target_path):
+        """占用该输出路径的源文件，不是已记录的输出时返回None"""
+        return self.targets.get(_path_key(target_path))
+
+    def is_up_to_date(self, source_path):
+        """源文件未修改、参数未变且输出仍存在时返回True"""
+        key = os.path.abspath(source_path)
+        st = os.stat(source_path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        self._stamps[key] = stamp
+        entry = self.entries.get(key)
+        return (entry is not None
+                and (entry['mtime_ns'], entry['size']) == stamp
+                and entry.get('options') == self.options
+                and os.path.exists(entry['target']))
+
+    def record(self, source_path, target_path):
+        """记录转换成功的文件，使用检查时取得的修改时间和大小"""
+        key = os.path.abspath(source_path)
+        mtime_ns, size = self._stamps.pop(key)
+        self.entries[key] = {
+            'mtime_ns': mtime_ns,
+            'size': size,
+            'target': target_path,
+            'options': self.options
+        }
+        self.targets[_path_key(target_path)] = key
+        self.dirty = True
+
+    def save(self):
+        """写回清单，先写临时文件再替换，避免中断时损坏"""
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+        self.dirty = False
+
+
 class ConvertWorker(QThread):
     """转换工作线程"""
     progress = pyqtSignal(str)  # 进度信号
@@ -107,21 +369,48 @@ class ConvertWorker(QThread):
     error = pyqtSignal(str)     # 错误信号
     no_matching_files = pyqtSignal()  # 无匹配文件信号
 
-    def __init__(self, source_paths, source_format, target_format, target_folder=None, quality=95):
+    def __init__(self, source_paths, source_format, target_format, target_folder=None, quality=95,
+                 max_workers=None, files=None, incremental=False, max_edge=None, resize_mode='fit',
+                 memory_budget_mb=MEMORY_BUDGET_MB, max_image_pixels=MAX_IMAGE_PIXELS):
         super().__init__()
         self.source_paths = source_paths
+        self.files = files  # 预先扫描好的文件清单，为None时在run中扫描
         self.source_format = source_format.lower() if source_format != "自动检测" else None
         self.target_format = target_format.lower()
         self.target_folder = target_folder
         self.quality = quality
+        # 缩放选项，max_edge 为 None 时保持原尺寸
+        self.max_edge = max_edge
+        self.resize_mode = resize_mode
+        # 并行进程数，默认等于CPU核心数；设为1时在本线程内逐个转换
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # 增量模式：跳过未修改的图片，修改过的图片覆盖原输出而不是另存为 name_1
+        self.incremental = incremental
+        self.manifest = None
+        # 多进程时同时处理的大图合计内存上限
+        self.memory_budget_mb = memory_budget_mb
+        self.max_image_pixels = max_image_pixels
         self.is_running = True
         self.total_files = 0
         self.converted_files = 0
+        self._reserved_paths = set()  # 已分配但可能尚未写出的目标路径
+        self._source_keys = set()  # 本次所有源文件，任何输出都不能覆盖它们
 
     def run(self):
         try:
-            # 首先计算总文件数
-            self.total_files = self._count_files()
+            files = self.files
+            if files is None:
+                files = filter_by_format(scan_images(self.source_paths), self.source_format)
+
+            if self.incremental:
+                options = {'quality': self.quality}
+                if self.max_edge:
+                    options['resize'] = [self.max_edge, self.resize_mode]
+                self.manifest = ConvertManifest(self._output_root(), self.target_format, options)
+                # 上次转换的输出与源文件在同一目录时会被再次扫描到，不能当作新的源文件
+                files = [f for f in files if self.manifest.owner(f) is None]
+            self._source_keys = {_path_key(f) for f in files}
+            self.total_files = len(files)
             
             # 如果没有找到匹配的文件，发出信号并返回
             if self.total_files == 0:
@@ -129,113 +418,138 @@ class ConvertWorker(QThread):
                 return
 
             converted_count = 0
-            for source_path in self.source_paths:
-                if not self.is_running:
-                    break
-
-                if os.path.isfile(source_path):
-                    if self._is_valid_source_file(source_path):
-                        self._convert_file(source_path)
-                        converted_count += 1
-                elif os.path.isdir(source_path):
-                    for root, _, files in os.walk(source_path):
-                        for file in files:
-                            if not self.is_running:
-                                break
-                            file_path = os.path.join(root, file)
-                            if self._is_valid_source_file(file_path):
-                                self._convert_file(file_path)
-                                converted_count += 1
+            for source_path, target_path, skipped, error in self._convert_all(files):
+                self.converted_files += 1
+                progress = int((self.converted_files / self.total_files) * 100)
+                if skipped:
+                    self.progress.emit(f"已跳过（未修改）: {source_path} ({progress}%)")
+                    continue
+                if error is None:
+                    self.progress.emit(f"已转换: {source_path} -> {target_path} ({progress}%)")
+                    if self.manifest is not None:
+                        self.manifest.record(source_path, target_path)
+                else:
+                    self.progress.emit(f"转换失败: {source_path} - {str(error)} ({progress}%)")
+                converted_count += 1
 
             self.finished.emit(converted_count)
         except Exception as e:
             self.error.emit(str(e))
+        finally:
+            if self.manifest is not None:
+                try:
+                    self.manifest.save()
+                except OSError as e:
+                    self.progress.emit(f"保存增量清单失败: {str(e)}")
 
-    def _count_files(self):
-        """计算需要转换的文件总数"""
-        count = 0
-        for source_path in self.source_paths:
-            if os.path.isfile(source_path):
-                if self._is_valid_source_file(source_path):
-                    count += 1
-            elif os.path.isdir(source_path):
-                for root, _, files in os.walk(source_path):
-                    for file in files:
-                        if self._is_valid_source_file(os.path.join(root, file)):
-                            count += 1
-        return count
-
-    def _is_valid_source_file(self, filepath):
-        """检查是否为有效的源文件"""
-        ext = os.path.splitext(filepath)[1].lower()
-        if self.source_format is None:  # 自动检测模式
-            return ext in {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.webp', '.ico'}
-        else:
-            # 根据选择的源格式进行验证
-            format_map = {
-                'png': '.png',
-                'jpeg': ('.jpg', '.jpeg'),
-                'jpg': ('.jpg', '.jpeg'),
-                'bmp': '.bmp',
-                'gif': '.gif',
-                'tiff': '.tiff',
-                'ico': '.ico',
-                'webp': '.webp'
-            }
-            valid_extensions = format_map.get(self.source_format, ())
-            if isinstance(valid_extensions, str):
-                valid_extensions = (valid_extensions,)
-            return ext in valid_extensions
-
-    def _convert_file(self, source_path):
-        try:
-            # 获取目标路径
-            filename = os.path.splitext(os.path.basename(source_path))[0]
-            
-            if self.target_folder:
-                # 如果指定了目标文件夹，保持源文件的相对路径结构
-                if os.path.isdir(self.source_paths[0]):
-                    # 获取相对路径
-                    rel_path = os.path.relpath(os.path.dirname(source_path), self.source_paths[0])
-                    # 在目标文件夹中创建相同的目录结构
-                    target_dir = os.path.join(self.target_folder, rel_path)
-                    os.makedirs(target_dir, exist_ok=True)
-                    target_path = os.path.join(target_dir, f"{filename}.{self.target_format}")
+    def _output_root(self):
+        """增量清单所在目录：目标文件夹，未指定时为源文件夹"""
+        if self.target_folder:
+            return self.target_folder
+        if os.path.isdir(self.source_paths[0]):
+            return self.source_paths[0]
+        return os.path.dirname(self.source_paths[0])
+
+    def _convert_all(self, files):
+        """转换所有文件，按源文件顺序产出 (源路径, 目标路径, 是否跳过, 异常或None)"""
+        if self.max_workers <= 1:
+            _init_pool(None, self.max_image_pixels)
+            for source_path in files:
+                if not self.is_running:
+                    return
+                target_path = self._target_path(source_path)
+                if self.manifest is not None and self.manifest.is_up_to_date(source_path):
+                    yield source_path, target_path, True, None
+                    continue
+                try:
+                    convert_image(source_path, target_path, self.target_format, self.quality,
+                                  self.max_edge, self.resize_mode)
+                    yield source_path, target_path, False, None
+                except Exception as e:
+                    yield source_path, target_path, False, e
+            return
+
+        # 统一使用spawn：在带Qt线程的进程中fork可能死锁，也与打包后的Windows程序行为一致
+        context = multiprocessing.get_context('spawn')
+        memory_budget = MemoryBudget(self.memory_budget_mb, context)
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context,
+                                 initializer=_init_pool,
+                                 initargs=(memory_budget, self.max_image_pixels)) as executor:
+            # 目标路径在主进程中依次分配，避免多个进程争用同一个文件名
+            tasks = []
+            for source_path in files:
+                if not self.is_running:
+                    break
+                target_path = self._target_path(source_path)
+                if self.manifest is not None and self.manifest.is_up_to_date(source_path):
+                    tasks.append((source_path, target_path, None))
+                    continue
+                future = executor.submit(convert_image, source_path, target_path,
+                                         self.target_format, self.quality,
+                                         self.max_edge, self.resize_mode)
+                tasks.append((source_path, target_path, future))
+
+            # 按提交顺序收集结果，保证日志顺序与单线程时一致
+            for source_path, target_path, future in tasks:
+                if not self.is_running:
+                    for _, _, pending in tasks:
+                        if pending is not None:
+                            pending.cancel()
+                    return
+                if future is None:
+                    yield source_path, target_path, True, None
                 else:
-                    # 单个文件或多个文件的情况
-                    target_path = os.path.join(self.target_folder, f"{filename}.{self.target_format}")
+                    yield source_path, target_path, False, future.exception()
+
+    def _target_path(self, source_path):
+        """计算目标路径，重名时添加后缀"""
+        filename = os.path.splitext(os.path.basename(source_path))[0]
+        
+        if self.target_folder:
+            # 如果指定了目标文件夹，保持源文件的相对路径结构
+            if os.path.isdir(self.source_paths[0]):
+                # 获取相对路径
+                rel_path = os.path.relpath(os.path.dirname(source_path), self.source_paths[0])
+                # 在目标文件夹中创建相同的目录结构
+                target_dir = os.path.join(self.target_folder, rel_path)
+                os.makedirs(target_dir, exist_ok=True)
+                target_path = os.path.join(target_dir, f"{filename}.{self.target_format}")
             else:
-                # 如果没有指定目标文件夹，使用源文件所在目录
-                target_path = os.path.join(os.path.dirname(source_path), f"{filename}.{self.target_format}")
-
-            # 如果目标文件已存在，添加后缀
-            counter = 1
-            base_target_path = target_path
-            while os.path.exists(target_path):
-                target_path = os.path.join(
-                    os.path.dirname(base_target_path),
-                    f"{filename}_{counter}.{self.target_format}"
-                )
-                counter += 1
-
-            # 转换图片
-            with Image.open(source_path) as img:
-                if self.target_format == 'jpg' or self.target_format == 'jpeg':
-                    # JPEG不支持透明通道，需要特殊处理
-                    if img.mode in ('RGBA', 'LA'):
-                        background = Image.new('RGB', img.size, (255, 255, 255))
-                        background.paste(img, mask=img.split()[-1])
-                        background.save(target_path, quality=self.quality)
-                    else:
-                        img.convert('RGB').save(target_path, quality=self.quality)
-                else:
-                    img.save(target_path)
+                # 单个文件或多个文件的情况
+                target_path = os.path.join(self.target_folder, f"{filename}.{self.target_format}")
+        else:
+            # 如果没有指定目标文件夹，使用源文件所在目录
+            target_path = os.path.join(os.path.dirname(source_path), f"{filename}.{self.target_format}")
 
-            self.converted_files += 1
-            progress = int((self.converted_files / self.total_files) * 100)
-            self.progress.emit(f"已转换: {source_path} -> {target_path} ({progress}%)")
-        except Exception as e:
-            self.progress.emit(f"转换失败: {source_path} - {str(e)}")
+        if self.manifest is not None:
+            # 增量模式沿用上次的输出路径，只有该源文件自己的旧输出才允许覆盖
+            previous = self.manifest.previous_target(source_path)
+            if previous and os.path.dirname(previous) == os.path.dirname(target_path):
+                target_path = previous
+            source_key = os.path.abspath(source_path)
+
+            def is_taken(path):
+                if path in self._reserved_paths or _path_key(path) in self._source_keys:
+                    return True
+                owner = self.manifest.owner(path)
+                if owner is not None:
+                    return owner != source_key
+                return os.path.exists(path)
+        else:
+            # 如果目标文件已存在（或已分配给其他源文件），添加后缀
+            def is_taken(path):
+                return os.path.exists(path) or path in self._reserved_paths
+
+        counter = 1
+        base_target_path = target_path
+        while is_taken(target_path):
+            target_path = os.path.join(
+                os.path.dirname(base_target_path),
+                f"{filename}_{counter}.{self.target_format}"
+            )
+            counter += 1
+        self._reserved_paths.add(target_path)
+        return target_path
 
     def stop(self):
         """停止转换"""
@@ -663,6 +977,49 @@ class ImageConvertApp(QMainWindow):
         target_folder_input_layout.addWidget(select_target_folder_button)
         
         format_layout.addLayout(target_folder_input_layout)
+
+        # 增量转换选项
+        self.incremental_cb = QCheckBox("增量转换（只转换新增或修改过的图片，覆盖旧的输出）")
+        self.incremental_cb.setStyleSheet("font-size: 13px; color: #2c3e50;")
+        format_layout.addWidget(self.incremental_cb)
+
+        # 缩放选项
+        resize_layout = QHBoxLayout()
+        resize_layout.setSpacing(8)
+        self.resize_cb = QCheckBox("缩小图片，最长边不超过")
+        self.resize_cb.setStyleSheet("font-size: 13px; color: #2c3e50;")
+        self.max_edge_spin = QSpinBox()
+        self.max_edge_spin.setRange(16, 20000)
+        self.max_edge_spin.setValue(1920)
+        self.max_edge_spin.setSuffix(" px")
+        self.max_edge_spin.setFixedHeight(32)
+        self.resize_mode_combo = QComboBox()
+        self.resize_mode_combo.addItems(["适应 - 保持比例", "填充 - 居中裁剪为正方形"])
+        self.resize_mode_combo.setFixedHeight(32)
+        self.max_edge_spin.setEnabled(False)
+        self.resize_mode_combo.setEnabled(False)
+        self.resize_cb.toggled.connect(self.max_edge_spin.setEnabled)
+        self.resize_cb.toggled.connect(self.resize_mode_combo.setEnabled)
+        resize_layout.addWidget(self.resize_cb)
+        resize_layout.addWidget(self.max_edge_spin)
+        resize_layout.addWidget(self.resize_mode_combo)
+        resize_layout.addStretch()
+        format_layout.addLayout(resize_layout)
+
+        # 并行进程数，默认等于CPU核心数；设为1时逐个转换，不启动子进程
+        workers_layout = QHBoxLayout()
+        workers_layout.setSpacing(8)
+        workers_label = QLabel("并行进程数：")
+        workers_label.setStyleSheet("font-size: 13px; color: #2c3e50;")
+        cpu_count = os.cpu_count() or 1
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, cpu_count * 2)
+        self.workers_spin.setValue(cpu_count)
+        self.workers_spin.setFixedHeight(32)
+        workers_layout.addWidget(workers_label)
+        workers_layout.addWidget(self.workers_spin)
+        workers_layout.addStretch()
+        format_layout.addLayout(workers_layout)
         
         # 添加间隔
         spacer = QWidget()
@@ -778,6 +1135,7 @@ class ImageConvertApp(QMainWindow):
 
         # 初始化成员变量
         self.selected_paths = []
+        self.scanned_files = None  # 所选位置的图片扫描结果，每次开始转换后失效
         self.worker = None
 
     def select_files(self):
@@ -790,6 +1148,7 @@ class ImageConvertApp(QMainWindow):
         )
         if files:
             self.selected_paths = files
+            self.scanned_files = None
             self.file_path.setText("; ".join(files))
             # 设置目标文件夹为第一个文件所在的目录
             first_file_dir = os.path.dirname(files[0])
@@ -800,6 +1159,7 @@ class ImageConvertApp(QMainWindow):
         folder = QFileDialog.getExistingDirectory(self, "选择源文件夹")
         if folder:
             self.selected_paths = [folder]
+            self.scanned_files = None
             self.file_path.setText(folder)
             # 更新目标文件夹路径
             self.target_folder_path.setText(folder)
@@ -824,13 +1184,17 @@ class ImageConvertApp(QMainWindow):
         """添加日志消息"""
         self.log_text.append(message)
 
+    def get_matching_files(self, source_format):
+        """从扫描结果中筛选指定源格式的文件，扫描结果失效前只扫描一次"""
+        if self.scanned_files is None:
+            self.scanned_files = scan_images(self.selected_paths)
+        return filter_by_format(self.scanned_files, None if source_format == "自动检测" else source_format.lower())
+
     def on_source_format_changed(self):
         """源格式改变时的处理"""
         if self.selected_paths:
-            # 创建临时工作线程来验证文件
             source_format = self.source_format_combo.currentText().split(' - ')[0]
-            temp_worker = ConvertWorker(self.selected_paths, source_format, "png")  # 目标格式无关紧要
-            file_count = temp_worker._count_files()
+            file_count = len(self.get_matching_files(source_format))
             
             if file_count == 0 and source_format != "自动检测":
                 dialog = CustomMessageBox(
@@ -855,11 +1219,12 @@ class ImageConvertApp(QMainWindow):
         # 获取目标文件夹
         target_folder = self.target_folder_path.text() or None
 
-        # 验证是否有匹配的源文件
-        temp_worker = ConvertWorker(self.selected_paths, source_format, target_format)
-        file_count = temp_worker._count_files()
+        # 验证是否有匹配的源文件，本次转换直接使用该结果
+        files = self.get_matching_files(source_format)
+        # 扫描结果只用于本次转换，下次转换重新扫描以发现新增或删除的图片
+        self.scanned_files = None
         
-        if file_count == 0:
+        if not files:
             if source_format == "自动检测":
                 dialog = CustomMessageBox("在选择的位置中未找到任何支持的图片文件！", self)
             else:
@@ -876,7 +1241,11 @@ class ImageConvertApp(QMainWindow):
         self.log_text.clear()
 
         # 创建并启动工作线程
-        self.worker = ConvertWorker(self.selected_paths, source_format, target_format, target_folder)
+        self.worker = ConvertWorker(self.selected_paths, source_format, target_format, target_folder,
+                                    max_workers=self.workers_spin.value(),
+                                    files=files, incremental=self.incremental_cb.isChecked(),
+                                    max_edge=self.max_edge_spin.value() if self.resize_cb.isChecked() else None,
+                                    resize_mode=RESIZE_MODES[self.resize_mode_combo.currentIndex()])
         self.worker.progress.connect(self.on_progress)
         self.worker.finished.connect(self.on_convert_finished)
         self.worker.error.connect(self.on_convert_error)
@@ -924,6 +1293,8 @@ class ImageConvertApp(QMainWindow):
 
 
 if __name__ == "__main__":
+    # 打包为exe后，进程池的子进程需要此调用才能正常启动
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = ImageConvertApp()
     window.show()
@@ -9,555 +9,76 @@
 
 import sys
 import os
-import requests
+import queue
+import threading
+from collections import deque
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QCalendarWidget, QListWidget, QTextEdit, 
                             QPushButton, QLabel, QCheckBox, QGroupBox, QProgressBar,
                             QFileDialog, QSpinBox, QToolButton, QMenu, QGridLayout,
-                            QLineEdit)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QDate
+                            QLineEdit, QDateEdit)
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QDate, QTimer
 from PyQt6.QtGui import QTextCharFormat, QColor, QFont, QAction
-from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from PyQt6.QtCore import QObject
-import urllib3
-from functools import partial
+from datetime import datetime
 from PyQt6.QtGui import QIcon
 
-# 禁用 urllib3 的警告信息
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# 链接获取与下载逻辑位于不依赖PyQt6的核心模块
+from newspaper_core import HAS_AIOHTTP, HAS_PYPDF, NEWSPAPERS, DownloadEngine, date_range
 
-class NewspaperDownloader(QObject):
-    progress_signal = pyqtSignal(str)  # 添加信号定义
-    
-    def __init__(self):
-        super().__init__()
-        self.download_folder = ""
-        # 统一的headers配置
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'application/pdf,text/html,*/*',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Connection': 'keep-alive'
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+class LogFileWriter:
+    """在后台线程中把日志写入文件，write只入队，不阻塞界面线程"""
 
-    def _get_page_content(self, url):
-        """统一的页面获取方法"""
-        try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            response.encoding = 'utf-8'
-            return response.text
-        except Exception as e:
-            self.progress_signal.emit(f"获取页面失败: {str(e)}")
-            return None
+    def __init__(self, path):
+        self.path = path
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
 
-    def _format_title(self, newspaper, date, page_num, page_title=""):
-        """统一的标题格式化方法"""
-        date_str = date.strftime("%Y%m%d")
-        page_num = page_num.zfill(2)
-        return f"{newspaper}_{date_str}_第{page_num}版_{page_title}".strip('_')
-
-    def get_people_daily_links(self, date):
-        """获取人民日报PDF链接"""
-        try:
-            self.progress_signal.emit("正在获取人民日报版面...")
-            
-            # 修改日期格式以匹配新的URL结构
-            year_month = date.strftime("%Y%m")
-            day = date.strftime("%d")
-            year_month_day = date.strftime("%Y%m%d")
-            
-            # 构建新的URL格式
-            base_url = f"http://paper.people.com.cn/rmrb/pc/layout/{year_month}/{day}/"
-            index_url = f"{base_url}node_01.html"
-            
-            response = self.session.get(index_url)
-            response.raise_for_status()
-            response.encoding = 'utf-8'
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            pdf_links = []
-            pages = soup.select('div.swiper-slide a#pageLink')
-            
-            if not pages:
-                self.progress_signal.emit("未找到版面信息")
-                return []
-            
-            # 遍历每个版面
-            for page in pages:
-                try:
-                    page_url = page.get('href')
-                    if not page_url:
-                        continue
-                        
-                    # 获取版面号和标题
-                    page_text = page.text.strip()
-                    if '版：' in page_text:
-                        page_num = page_text.split('版：')[0].strip()
-                        page_title = page_text.split('版：')[1].strip()
-                        
-                        # 访问版面页面
-                        page_full_url = f"{base_url}{page_url}"
-                        page_response = self.session.get(page_full_url)
-                        page_response.raise_for_status()
-                        page_response.encoding = 'utf-8'
-                        page_soup = BeautifulSoup(page_response.text, 'html.parser')
-                        
-                        # 在版面页面中查找PDF下载链接
-                        pdf_link = page_soup.select_one('a[href*="attachement"][href$=".pdf"]')
-                        if pdf_link and 'href' in pdf_link.attrs:
-                            pdf_href = pdf_link['href']
-                            # 提取PDF文件ID
-                            pdf_file_id = pdf_href.split('/')[-1]
-                            
-                            # 构建完整的PDF URL
-                            pdf_url = f"http://paper.people.com.cn/rmrb/pc/attachement/{year_month}/{day}/{pdf_file_id}"
-                            title = f"人民日报_{year_month_day}_第{page_num.zfill(2)}版_{page_title}"
-                            
-                            pdf_links.append((title, pdf_url))
-                        
-                except Exception as e:
-                    self.progress_signal.emit(f"处理版面出错: {str(e)}")
-                    continue
-            
-            self.progress_signal.emit(f"找到 {len(pdf_links)} 个版面")
-            return pdf_links
-            
-        except Exception as e:
-            self.progress_signal.emit(f"获取人民日报版面出错: {str(e)}")
-            return []
+    def write(self, line):
+        self.queue.put(line)
 
-    def get_economic_daily_links(self, date):
-        """获取经济日报PDF链接"""
-        try:
-            self.progress_signal.emit("正在获取经济日报版面...")
-            year_month = date.strftime("%Y%m")
-            day = date.strftime("%d")
-            year_month_day = date.strftime("%Y%m%d")
-            
-            # 构建新的URL格式
-            base_url = f"http://paper.ce.cn/pc/layout/{year_month}/{day}/"
-            index_url = f"{base_url}node_01.html"
-            
-            response = self.session.get(index_url)
-            response.raise_for_status()
-            response.encoding = 'utf-8'
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            pdf_links = []
-            pages = soup.select('ul#layoutlist li.posRelative')
-            
-            if not pages:
-                self.progress_signal.emit("未找到版面信息")
-                return []
-            
-            for page in pages:
-                try:
-                    # 获取版面信息
-                    title_link = page.select_one('a:not(.pdf)')
-                    if not title_link:
-                        continue
-                        
-                    title_text = title_link.text.strip()
-                    if '版：' in title_text:
-                        page_num = title_text.split('第')[1].split('版')[0].strip()
-                        page_title = title_text.split('版：')[1].strip()
-                        
-                        # 获取PDF链接
-                        hidden_input = page.select_one('input[type="hidden"]')
-                        if hidden_input and hidden_input.get('value'):
-                            pdf_href = hidden_input.get('value')
-                            if pdf_href.startswith('../../../'):
-                                pdf_href = pdf_href.replace('../../../', '')
-                            
-                            # 构建完整的PDF URL
-                            pdf_url = f"http://paper.ce.cn/pc/{pdf_href}"
-                            title = f"经济日报_{year_month_day}_第{page_num.zfill(2)}版_{page_title}"
-                            
-                            pdf_links.append((title, pdf_url))
-                
-                except Exception as e:
-                    self.progress_signal.emit(f"处理版面出错: {str(e)}")
-                    continue
-            
-            self.progress_signal.emit(f"找到 {len(pdf_links)} 个版面")
-            return pdf_links
-            
-        except Exception as e:
-            self.progress_signal.emit(f"获取经济日报版面出错: {str(e)}")
-            return []
-
-    def get_legal_daily_links(self, date):
-        """获取法治日报PDF链接"""
-        try:
-            self.progress_signal.emit("正在获取法治日报版面...")
-            date_str = date.strftime("%Y%m%d")
-            
-            index_url = f"http://epaper.legaldaily.com.cn/fzrb/content/{date_str}/Page01TB.htm"
-            
-            response = self.session.get(index_url)
-            response.raise_for_status()
-            response.encoding = 'utf-8'
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            pdf_links = []
-            # 修改选择器，选择表格中的所有版面链接
-            pages = soup.select('td a.atitle')
-            
-            if not pages:
-                self.progress_signal.emit("未找到版面信息")
-                return []
-            
-            for page in pages:
-                try:
-                    title_text = page.text.strip()
-                    if ':' in title_text:
-                        page_num, page_title = title_text.split(':', 1)
-                        page_num = page_num.strip()
-                        page_title = page_title.strip()
-                        
-                        # 构建PDF URL
-                        pdf_url = f"http://epaper.legaldaily.com.cn/fzrb/PDF/{date_str}/{page_num.zfill(2)}.pdf"
-                        title = f"法治日报_{date_str}_第{page_num.zfill(2)}版_{page_title}"
-                        
-                        pdf_links.append((title, pdf_url))
-                except Exception as e:
-                    self.progress_signal.emit(f"处理版面出错: {str(e)}")
-                    continue
-            
-            self.progress_signal.emit(f"找到 {len(pdf_links)} 个版面")
-            return pdf_links
-            
-        except Exception as e:
-            self.progress_signal.emit(f"获取法治日报版面出错: {str(e)}")
-            return []
-
-    def get_worker_daily_links(self, date):
-        """获取工人日报PDF链接"""
-        try:
-            self.progress_signal.emit("正在获取工人日报版面...")
-            date_str = date.strftime("%Y/%m/%d")
-            year_month_day = date.strftime("%Y%m%d")
-            
-            index_url = f"https://www.workercn.cn/papers/grrb/{date_str}/1/page.html"
-            
-            response = self.session.get(index_url)
-            response.raise_for_status()
-            response.encoding = 'utf-8'
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            pdf_links = []
-            pages = soup.select('ul#pageUrl li')
-            
-            if not pages:
-                self.progress_signal.emit("未找到版面信息")
-                return []
-            
-            for page in pages:
-                try:
-                    page_num = page.select_one('a:not(.pdf)').text.strip()
-                    pdf_link = page.select_one('a.pdf')
-                    
-                    if pdf_link and 'href' in pdf_link.attrs:
-                        pdf_url = f"https://www.workercn.cn{pdf_link['href']}"
-                        page_title = "头版" if page_num == "1" else ""
-                        
-                        title = f"工人日报_{year_month_day}_第{page_num.zfill(2)}版_{page_title}"
-                        pdf_links.append((title, pdf_url))
-                
-                except Exception as e:
-                    self.progress_signal.emit(f"处理版面出错: {str(e)}")
-                    continue
-            
-            self.progress_signal.emit(f"找到 {len(pdf_links)} 个版面")
-            return pdf_links
-            
-        except Exception as e:
-            self.progress_signal.emit(f"获取工人日报版面出错: {str(e)}")
-            return []
-
-    def get_science_daily_links(self, date):
-        """获取科技日报PDF链接"""
-        try:
-            self.progress_signal.emit("正在获取科技日报版面...")
-            date_str = date.strftime("%Y-%m/%d")
-            year_month_day = date.strftime("%Y%m%d")
-            
-            index_url = f"https://digitalpaper.stdaily.com/http_www.kjrb.com/kjrb/html/{date_str}/node_2.htm"
-            
-            response = self.session.get(index_url)
-            response.raise_for_status()
-            response.encoding = 'utf-8'
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            pdf_links = []
-            pages = soup.select('div.bmname div a#pageLink')
-            
-            if not pages:
-                self.progress_signal.emit("未找到版面信息")
-                return []
-            
-            for page in pages:
-                try:
-                    title_text = page.text.strip()
-                    if '：' in title_text:
-                        page_num = title_text.split('第')[1].split('版')[0].strip()
-                        page_title = title_text.split('：')[1].strip()
-                        
-                        pdf_url = f"https://digitalpaper.stdaily.com/http_www.kjrb.com/kjrb/images/{date_str}/{page_num}/KJRB{year_month_day}{page_num}.pdf"
-                        title = f"科技日报_{year_month_day}_第{page_num}版_{page_title}"
-                        
-                        pdf_links.append((title, pdf_url))
-                
-                except Exception as e:
-                    self.progress_signal.emit(f"处理版面出错: {str(e)}")
-                    continue
-            
-            self.progress_signal.emit(f"找到 {len(pdf_links)} 个版面")
-            return pdf_links
-            
-        except Exception as e:
-            self.progress_signal.emit(f"获取科技日报版面出错: {str(e)}")
-            return []
-
-    def get_xinhua_daily_links(self, date):
-        """获取新华日报PDF链接"""
-        try:
-            self.progress_signal.emit("正在获取新华日报版面...")
-            year_month = date.strftime("%Y%m")
-            day = date.strftime("%d")
-            year_month_day = date.strftime("%Y%m%d")
-            
-            # 构建新的URL格式
-            base_url = f"https://xh.xhby.net/pc/layout/{year_month}/{day}/"
-            index_url = f"{base_url}node_1.html"
-            
-            response = self.session.get(index_url)
-            response.raise_for_status()
-            response.encoding = 'utf-8'
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            pdf_links = []
-            pages = soup.select('div.Chunkiconlist p')
-            
-            if not pages:
-                self.progress_signal.emit("未找到版面信息")
-                return []
-            
-            for page in pages:
-                try:
-                    # 获取版面信息
-                    title_link = page.select_one('a:first-child')
-                    pdf_link = page.select_one('a[href$=".pdf"]')
-                    
-                    if title_link and pdf_link:
-                        title_text = title_link.text.strip()
-                        if '版：' in title_text:
-                            page_num = title_text.split('第')[1].split('版')[0].strip()
-                            page_title = title_text.split('版：')[1].strip()
-                            
-                            # 获取PDF链接
-                            pdf_href = pdf_link['href']
-                            if pdf_href.startswith('../../../'):
-                                pdf_href = pdf_href.replace('../../../', '')
-                            
-                            # 构建完整的PDF URL
-                            pdf_url = f"https://xh.xhby.net/pc/{pdf_href}"
-                            title = f"新华日报_{year_month_day}_第{page_num.zfill(2)}版_{page_title}"
-                            
-                            pdf_links.append((title, pdf_url))
-                
-                except Exception as e:
-                    self.progress_signal.emit(f"处理版面出错: {str(e)}")
-                    continue
-            
-            self.progress_signal.emit(f"找到 {len(pdf_links)} 个版面")
-            return pdf_links
-            
-        except Exception as e:
-            self.progress_signal.emit(f"获取新华日报版面出错: {str(e)}")
-            return []
+    def _run(self):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            while True:
+                line = self.queue.get()
+                if line is None:
+                    break
+                f.write(line + '\n')
+                # 队列中暂无日志时才刷新到磁盘，大量日志时批量写入
+                if self.queue.empty():
+                    f.flush()
 
-    # ... (其他报纸的下载方法保持不变)
+    def close(self):
+        """写完队列中的日志后关闭文件"""
+        self.queue.put(None)
+        self.thread.join()
 
 class DownloaderThread(QThread):
+    """在Qt线程中运行下载核心，进度消息通过信号发送到界面"""
     progress_signal = pyqtSignal(str)
+    progress_update = pyqtSignal(object)  # 节流后的ProgressSnapshot
+    NEWSPAPERS = NEWSPAPERS
     
-    def __init__(self, newspaper_types, date, download_dir, max_workers=10):  # 增加并发数
+    def __init__(self, newspaper_types, dates, download_dir, max_workers=10, engine='thread',
+                 merge=False):
         super().__init__()
-        self.newspaper_types = newspaper_types
-        self.date = date
-        self.download_dir = download_dir
-        self.max_workers = max_workers
-        self.timeout = 30  # 增加超时时间
-        self.chunk_size = 2 * 1024 * 1024  # 增加到2MB
-        
-        # 初始化下载器
-        self.downloader = NewspaperDownloader()
-        self.downloader.download_folder = download_dir
-        self.downloader.progress_signal = self.progress_signal
-        
-        self.is_running = True
-        # 优化session配置
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'application/pdf,text/html,*/*',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Connection': 'keep-alive'
-        })
-        # 设置连接池参数
-        adapter = requests.adapters.HTTPAdapter(
-            pool_connections=20,    # 连接池大小
-            pool_maxsize=20,       # 最大连接数
-            max_retries=3          # 重试次数
+        self.core = DownloadEngine(
+            newspaper_types, dates, download_dir,
+            max_workers=max_workers, engine=engine, log=self.progress_signal.emit, merge=merge,
+            progress=self.progress_update.emit
         )
-        self.session.mount('http://', adapter)
-        self.session.mount('https://', adapter)
-
-    def download_file(self, url, filename):
-        """优化的文件下载方法"""
-        try:
-            response = self.session.get(
-                url,
-                stream=True,
-                verify=False,
-                timeout=self.timeout
-            )
-            
-            if response.status_code == 200:
-                file_path = os.path.join(self.download_dir, filename)
-                
-                # 使用with确保文件正确关闭
-                with open(file_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=self.chunk_size):
-                        if not chunk or not self.is_running:
-                            break
-                        f.write(chunk)
-                
-                # 验证文件大小
-                if os.path.getsize(file_path) > 0:
-                    return True, filename
-                else:
-                    os.remove(file_path)  # 删除空文件
-                    return False, filename
-            return False, filename
-            
-        except Exception as e:
-            self.progress_signal.emit(f"下载出错: {str(e)}")
-            return False, filename
-
-    def download_files_with_threadpool(self, files_to_download):
-        """优化的并发下载方法"""
-        if not files_to_download or not self.is_running:
-            return
-
-        total = len(files_to_download)
-        completed = 0
-        failed = 0
-        
-        try:
-            self.progress_signal.emit(f"开始下载 {total} 个文件...")
-            
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                futures = []
-                for file_info in files_to_download:
-                    if not self.is_running:
-                        break
-                    try:
-                        url = file_info[1]
-                        filename = f"{file_info[0]}.pdf"
-                        future = executor.submit(self.download_file, url, filename)
-                        futures.append(future)
-                    except Exception as e:
-                        self.progress_signal.emit(f"创建下载任务失败: {str(e)}")
-                        failed += 1
-
-                # 处理完成的任务
-                for future in as_completed(futures):
-                    if not self.is_running:
-                        self.progress_signal.emit("用户取消下载")
-                        # 取消所有未完成的任务
-                        for f in futures:
-                            if not f.done():
-                                f.cancel()
-                        executor.shutdown(wait=False)
-                        return
-                        
-                    completed += 1
-                    try:
-                        success, filename = future.result()
-                        if not success:
-                            failed += 1
-                    except Exception as e:
-                        failed += 1
-                        self.progress_signal.emit(f"下载任务异常: {str(e)}")
-
-            # 只有在正常完成时才输出最终结果
-            if self.is_running:
-                if failed > 0:
-                    self.progress_signal.emit(
-                        f"下载完成，共 {total} 个文件，成功 {total-failed} 个，失败 {failed} 个"
-                    )
-                else:
-                    self.progress_signal.emit(f"全部 {total} 个文件下载成功")
-
-        except Exception as e:
-            self.progress_signal.emit(f"下载系统错误: {str(e)}")
 
     def run(self):
-        try:
-            if 'people' in self.newspaper_types and self.is_running:
-                self.progress_signal.emit("开始下载人民日报...")
-                links = self.downloader.get_people_daily_links(self.date)
-                if links and self.is_running:
-                    self.download_files_with_threadpool(links)
-
-            if 'economic' in self.newspaper_types and self.is_running:
-                self.progress_signal.emit("开始下载经济日报...")
-                links = self.downloader.get_economic_daily_links(self.date)
-                if links and self.is_running:
-                    self.download_files_with_threadpool(links)
-
-            if 'legal' in self.newspaper_types and self.is_running:
-                self.progress_signal.emit("开始下载法治日报...")
-                links = self.downloader.get_legal_daily_links(self.date)
-                if links and self.is_running:
-                    self.download_files_with_threadpool(links)
-
-            if 'worker' in self.newspaper_types and self.is_running:
-                self.progress_signal.emit("开始下载工人日报...")
-                links = self.downloader.get_worker_daily_links(self.date)
-                if links and self.is_running:
-                    self.download_files_with_threadpool(links)
-
-            if 'science' in self.newspaper_types and self.is_running:
-                self.progress_signal.emit("开始下载科技日报...")
-                links = self.downloader.get_science_daily_links(self.date)
-                if links and self.is_running:
-                    self.download_files_with_threadpool(links)
-
-            if 'xinhua' in self.newspaper_types and self.is_running:
-                self.progress_signal.emit("开始下载新华日报...")
-                links = self.downloader.get_xinhua_daily_links(self.date)
-                if links and self.is_running:
-                    self.download_files_with_threadpool(links)
-
-            if self.is_running:
-                self.progress_signal.emit("所有文件下载完成")
-                
-        except Exception as e:
-            self.progress_signal.emit(f"下载出错: {str(e)}")
+        self.core.run()
 
     def stop(self):
         """停止下载"""
-        self.is_running = False
+        self.core.stop()
 
 class NewspaperDownloaderGUI(QMainWindow):
+    LOG_MAX_LINES = 5000  # 日志区域保留的最大行数，超出后丢弃最早的行
+    LOG_FLUSH_INTERVAL = 100  # 日志合并刷新到界面的间隔（毫秒）
+
     def __init__(self):
         super().__init__()
         # 设置窗口图标
@@ -675,6 +196,41 @@ class NewspaperDownloaderGUI(QMainWindow):
         invert_select_btn.clicked.connect(self.invert_newspaper_selection)
         clear_select_btn.clicked.connect(self.clear_newspaper_selection)
         
+        # 日期范围选择
+        range_group = QGroupBox("日期范围")
+        range_layout = QGridLayout(range_group)
+        
+        self.range_mode_cb = QCheckBox("按日期范围批量下载")
+        self.range_start_edit = QDateEdit()
+        self.range_end_edit = QDateEdit()
+        for date_edit in [self.range_start_edit, self.range_end_edit]:
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat("yyyy-MM-dd")
+            date_edit.setDateRange(QDate(2000, 1, 1), QDate.currentDate())
+        self.range_start_edit.setDate(QDate.currentDate().addDays(-6))
+        self.range_end_edit.setDate(QDate.currentDate())
+        
+        # 星期过滤，默认全部选中
+        weekday_layout = QHBoxLayout()
+        self.weekday_cbs = []
+        for day_name in ["一", "二", "三", "四", "五", "六", "日"]:
+            weekday_cb = QCheckBox(day_name)
+            weekday_cb.setChecked(True)
+            weekday_layout.addWidget(weekday_cb)
+            self.weekday_cbs.append(weekday_cb)
+        weekday_layout.addStretch()
+        
+        range_layout.addWidget(self.range_mode_cb, 0, 0, 1, 2)
+        range_layout.addWidget(QLabel("开始日期："), 1, 0)
+        range_layout.addWidget(self.range_start_edit, 1, 1)
+        range_layout.addWidget(QLabel("结束日期："), 2, 0)
+        range_layout.addWidget(self.range_end_edit, 2, 1)
+        range_layout.addWidget(QLabel("星期："), 3, 0)
+        range_layout.addLayout(weekday_layout, 3, 1)
+        
+        self.range_mode_cb.toggled.connect(self.on_range_mode_toggled)
+        self.on_range_mode_toggled(False)
+        
         # 下载目录选择
         dir_group = QGroupBox("下载目录")
         dir_layout = QHBoxLayout(dir_group)  # 改为水平布局
@@ -736,7 +292,28 @@ class NewspaperDownloaderGUI(QMainWindow):
         self.download_btn.setEnabled(True)
         self.cancel_btn.setEnabled(False)
         
+        # 并发数与下载引擎设置
+        engine_layout = QHBoxLayout()
+        engine_layout.addWidget(QLabel("并发数："))
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 100)
+        self.workers_spin.setValue(10)
+        engine_layout.addWidget(self.workers_spin)
+        self.async_engine_cb = QCheckBox("异步下载引擎")
+        self.async_engine_cb.setToolTip("使用asyncio单事件循环下载，适合高并发（需要安装aiohttp）")
+        self.async_engine_cb.setEnabled(HAS_AIOHTTP)
+        engine_layout.addWidget(self.async_engine_cb)
+        self.merge_cb = QCheckBox("合并为整份PDF")
+        self.merge_cb.setToolTip("每份报纸下载完成后按版面顺序合并为 报纸名_YYYYMMDD.pdf（需要安装pypdf）")
+        self.merge_cb.setEnabled(HAS_PYPDF)
+        engine_layout.addWidget(self.merge_cb)
+        self.log_file_cb = QCheckBox("保存日志文件")
+        self.log_file_cb.setToolTip("将完整日志保存到下载目录，界面只保留最近的日志")
+        engine_layout.addWidget(self.log_file_cb)
+        engine_layout.addStretch()
+        
         # 添加按钮到布局
+        control_layout.addLayout(engine_layout)
         control_layout.addWidget(self.download_btn)
         control_layout.addWidget(self.cancel_btn)
         
@@ -746,6 +323,7 @@ class NewspaperDownloaderGUI(QMainWindow):
         
         # 添加组到左侧布局
         left_layout.addWidget(download_group)
+        left_layout.addWidget(range_group)
         left_layout.addWidget(dir_group)
         left_layout.addWidget(control_group)
         left_layout.addStretch()
@@ -1029,7 +607,10 @@ class NewspaperDownloaderGUI(QMainWindow):
         
         # 初始化进度条为0
         self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
         self.progress_bar.setValue(0)
+        self.progress_bar.setTextVisible(False)
+        self.progress_label = QLabel("")
         
         # 下载日志
         log_label = QLabel("下载日志：")
@@ -1037,9 +618,20 @@ class NewspaperDownloaderGUI(QMainWindow):
         self.log_text.setReadOnly(True)
         self.log_text.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)  # 设置自定义右键菜单
         self.log_text.customContextMenuRequested.connect(self.show_log_context_menu)  # 连接右键菜单信号
+        self.log_text.document().setMaximumBlockCount(self.LOG_MAX_LINES)
+        
+        # 日志先写入缓冲区，由定时器合并后一次性追加到界面
+        self.log_buffer = deque(maxlen=self.LOG_MAX_LINES)
+        self.log_timer = QTimer(self)
+        self.log_timer.setSingleShot(True)
+        self.log_timer.setInterval(self.LOG_FLUSH_INTERVAL)
+        self.log_timer.timeout.connect(self.flush_log)
+        self.log_file = None
         
         right_layout.addWidget(calendar_label)
         right_layout.addWidget(self.calendar)
+        right_layout.addWidget(self.progress_bar)
+        right_layout.addWidget(self.progress_label)
         right_layout.addWidget(log_label)
         right_layout.addWidget(self.log_text)
         
@@ -1180,22 +772,84 @@ class NewspaperDownloaderGUI(QMainWindow):
         self.dir_edit.setText(self.download_dir)
         
     def log_message(self, message):
-        """添加日志消息"""
+        """添加日志消息，先写入缓冲区，由定时器合并刷新"""
         current_time = datetime.now().strftime("%H:%M:%S")
-        self.log_text.append(f"[{current_time}] {message}")
-        # 滚动到底部
-        self.log_text.verticalScrollBar().setValue(
-            self.log_text.verticalScrollBar().maximum()
-        )
+        line = f"[{current_time}] {message}"
+        self.log_buffer.append(line)
+        if self.log_file:
+            self.log_file.write(line)
+        if not self.log_timer.isActive():
+            self.log_timer.start()
 
-    def start_download(self):
-        """开始下载"""
-        # 检查日期是否有效
-        selected_date = self.calendar.selectedDate().toPyDate()
+    def flush_log(self):
+        """将缓冲区中的日志一次性追加到日志区域"""
+        if not self.log_buffer:
+            return
+        scroll_bar = self.log_text.verticalScrollBar()
+        at_bottom = scroll_bar.value() >= scroll_bar.maximum() - 4
+        self.log_text.append("\n".join(self.log_buffer))
+        self.log_buffer.clear()
+        # 仅在查看最新日志时滚动到底部，不打断向上翻看
+        if at_bottom:
+            scroll_bar.setValue(scroll_bar.maximum())
+
+    def open_log_file(self):
+        """在下载目录中创建本次下载的日志文件"""
+        filename = f"newspaper_download_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+        try:
+            os.makedirs(self.download_dir, exist_ok=True)
+            self.log_file = LogFileWriter(os.path.join(self.download_dir, filename))
+            self.log_message(f"日志保存到: {self.log_file.path}")
+        except OSError as e:
+            self.log_message(f"创建日志文件失败: {str(e)}")
+
+    def close_log_file(self):
+        if self.log_file:
+            self.log_file.close()
+            self.log_file = None
+
+    def update_progress(self, snapshot):
+        """根据下载进度快照更新进度条和速度、剩余时间显示"""
+        self.progress_bar.setValue(int(snapshot.fraction * 1000))
+        self.progress_label.setText(str(snapshot))
+
+    def on_range_mode_toggled(self, checked):
+        """切换单日/日期范围模式"""
+        self.range_start_edit.setEnabled(checked)
+        self.range_end_edit.setEnabled(checked)
+        for weekday_cb in self.weekday_cbs:
+            weekday_cb.setEnabled(checked)
+
+    def get_selected_dates(self):
+        """获取要下载的日期列表，出错时记录日志并返回空列表"""
         current_date = datetime.now().date()
+        if not self.range_mode_cb.isChecked():
+            selected_date = self.calendar.selectedDate().toPyDate()
+            if selected_date > current_date:
+                self.log_message("错误：不能选择未来的日期！")
+                return []
+            return [selected_date]
         
-        if selected_date > current_date:
+        start_date = self.range_start_edit.date().toPyDate()
+        end_date = self.range_end_edit.date().toPyDate()
+        if start_date > end_date:
+            self.log_message("错误：开始日期不能晚于结束日期！")
+            return []
+        if end_date > current_date:
             self.log_message("错误：不能选择未来的日期！")
+            return []
+        
+        weekdays = {i for i, weekday_cb in enumerate(self.weekday_cbs) if weekday_cb.isChecked()}
+        dates = date_range(start_date, end_date, weekdays)
+        if not dates:
+            self.log_message("错误：所选范围内没有符合星期条件的日期！")
+        return dates
+
+    def start_download(self):
+        """开始下载"""
+        # 检查日期是否有效
+        dates = self.get_selected_dates()
+        if not dates:
             return
         
         # 检查是否选择了报纸
@@ -1217,27 +871,31 @@ class NewspaperDownloaderGUI(QMainWindow):
             self.log_message("错误：请至少选择一种报纸！")
             return
         
-        # 获取选择的日期
-        date_str = selected_date.strftime("%Y-%m-%d")
+        if self.log_file_cb.isChecked():
+            self.open_log_file()
         
-        # 在下载目录下创建日期子文件夹
-        date_folder = os.path.join(self.download_dir, date_str)
-        try:
-            if not os.path.exists(date_folder):
-                os.makedirs(date_folder)
-                self.log_message(f"创建日期文件夹: {date_str}")
-        except Exception as e:
-            self.log_message(f"创建日期文件夹失败: {str(e)}")
-            return
+        if len(dates) > 1:
+            self.log_message(
+                f"批量下载 {dates[0].strftime('%Y-%m-%d')} 至 {dates[-1].strftime('%Y-%m-%d')}，共 {len(dates)} 天"
+            )
         
         # 更新UI状态
         self.download_btn.setEnabled(False)
         self.cancel_btn.setEnabled(True)
         
         # 创建并启动下载线程
-        self.download_thread = DownloaderThread(newspaper_types, selected_date, date_folder)
+        engine = 'async' if self.async_engine_cb.isChecked() else 'thread'
+        # 每个日期的文件由下载线程保存到 下载目录/YYYY-MM-DD 子文件夹
+        self.download_thread = DownloaderThread(
+            newspaper_types, dates, self.download_dir,
+            max_workers=self.workers_spin.value(), engine=engine,
+            merge=self.merge_cb.isChecked()
+        )
         self.download_thread.progress_signal.connect(self.log_message)
+        self.download_thread.progress_update.connect(self.update_progress)
         self.download_thread.finished.connect(self.download_finished)
+        self.progress_bar.setValue(0)
+        self.progress_label.setText("")
         self.download_thread.start()
 
     def cancel_download(self):
@@ -1252,6 +910,8 @@ class NewspaperDownloaderGUI(QMainWindow):
         """下载完成后的处理"""
         self.download_btn.setEnabled(True)
         self.cancel_btn.setEnabled(False)
+        self.flush_log()
+        self.close_log_file()
 
     def get_highlighted_date_format(self):
         """获取高亮日期的格式"""
@@ -1368,6 +1028,7 @@ class NewspaperDownloaderGUI(QMainWindow):
 
     def clear_log(self):
         """清空日志内容"""
+        self.log_buffer.clear()
         self.log_text.clear()
 
     def select_all_newspapers(self):
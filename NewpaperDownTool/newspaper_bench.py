@@ -0,0 +1,451 @@
+"""
+报纸下载基准测试工具 (Newspaper Download Benchmark)
+功能：录制版面页面和PDF，在本地回放服务器上离线测试和基准测试下载器
+用法：
+    python -m newspaper_bench record -p people legal -d 2025-01-16 --fixtures fixtures
+    python -m newspaper_bench serve --fixtures fixtures --latency 0.05 --bandwidth 2048
+    python -m newspaper_bench run --fixtures fixtures -j 1 5 10 20 --error-rate 0.02
+    python -m newspaper_bench parse samples/*.html --repeat 50
+    python -m newspaper_bench titles --count 100000
+作者：s-Ruthless
+创建时间：2025-01-16
+最后修改：2025-01-16
+版本：1.0
+"""
+
+import os
+import sys
+import time
+import json
+import random
+import shutil
+import hashlib
+import tempfile
+import argparse
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from newspaper_core import (NEWSPAPERS, SITE_PROFILES, DownloadEngine, NewspaperDownloader,
+                            TimeoutHTTPAdapter, available_html_backends, create_session,
+                            dedupe_links, parse_date, parse_html, parse_positive_int,
+                            print_log, run_engine)
+
+# 各报纸爬虫实际使用的CSS选择器，由站点配置生成
+SCRAPER_SELECTORS = list(dict.fromkeys(
+    selector
+    for profile in SITE_PROFILES.values()
+    for selector in [profile['page_selector'], profile.get('title_selector')]
+                    + [rule.get('selector') for rule in profile['pdf_rules']]
+    if selector
+))
+
+class FixtureStore:
+    """录制的HTTP响应，index.json记录URL到响应文件的映射"""
+    INDEX = 'index.json'
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.lock = threading.Lock()
+        self.index = {'meta': {}, 'responses': {}}
+        index_path = os.path.join(folder, self.INDEX)
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+
+    def save(self, url, status, headers, body):
+        filename = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        with open(os.path.join(self.folder, filename), 'wb') as f:
+            f.write(body)
+        with self.lock:
+            self.index['responses'][url] = {
+                'file': filename,
+                'status': status,
+                'content_type': headers.get('Content-Type', ''),
+                'location': headers.get('Location'),
+            }
+
+    def lookup(self, url):
+        """返回(录制信息, 响应内容)，未录制时返回(None, None)"""
+        entry = self.index['responses'].get(url)
+        if entry is None:
+            return None, None
+        with open(os.path.join(self.folder, entry['file']), 'rb') as f:
+            return entry, f.read()
+
+    def write_index(self):
+        with self.lock:
+            with open(os.path.join(self.folder, self.INDEX), 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, ensure_ascii=False, indent=1)
+
+    def recording_hook(self, response, *args, **kwargs):
+        """requests响应钩子，读取并保存响应内容（包括重定向）"""
+        if response.status_code < 400:
+            self.save(response.request.url, response.status_code, response.headers, response.content)
+        return response
+
+class ReplayAdapter(TimeoutHTTPAdapter):
+    """将请求改写到本地回放服务器，并记录每个请求的首字节时间"""
+    replay_base = ''
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ttfb = []
+        self.ttfb_lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        path = parts.path + (f"?{parts.query}" if parts.query else '')
+        request.url = f"{self.replay_base}/{parts.scheme}/{parts.netloc}{path}"
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        with self.ttfb_lock:
+            self.ttfb.append(time.perf_counter() - start)
+        return response
+
+class ReplayServer(ThreadingHTTPServer):
+    """本地回放服务器，支持延迟、带宽限制、错误注入以及Range/ETag请求"""
+    daemon_threads = True
+
+    def __init__(self, store, port=0, latency=0.0, bandwidth=0, error_rate=0.0, drop_rate=0.0):
+        super().__init__(('127.0.0.1', port), ReplayHandler)
+        self.store = store
+        self.latency = latency          # 首字节延迟（秒）
+        self.bandwidth = bandwidth      # 单连接带宽（字节/秒），0为不限
+        self.error_rate = error_rate    # 返回503的概率
+        self.drop_rate = drop_rate      # 传输中途断开的概率
+        self.stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.stats_lock:
+            self.stats = {'requests': 0, 'html': 0, 'pdf': 0, 'bytes': 0, 'errors': 0}
+
+    def count(self, **values):
+        with self.stats_lock:
+            for key, value in values.items():
+                self.stats[key] += value
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    chunk_size = 64 * 1024
+
+    def log_message(self, format, *args):
+        pass
+
+    def _original_url(self):
+        # 路径格式：/{scheme}/{host}/{原始路径}
+        scheme, _, rest = self.path.lstrip('/').partition('/')
+        return f"{scheme}://{rest}"
+
+    def _send_empty(self, status, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        server = self.server
+        server.count(requests=1)
+        if server.latency:
+            time.sleep(server.latency * random.uniform(0.5, 1.5))
+
+        entry, body = server.store.lookup(self._original_url())
+        if entry is None:
+            self._send_empty(404)
+            return
+        if random.random() < server.error_rate:
+            server.count(errors=1)
+            self._send_empty(503, {'Retry-After': '1'})
+            return
+        if entry['location']:
+            self._send_empty(entry['status'], {'Location': entry['location']})
+            return
+
+        etag = f'"{entry["file"]}"'
+        if self.headers.get('If-None-Match') == etag:
+            self._send_empty(304, {'ETag': etag})
+            return
+
+        status, start = 200, 0
+        range_header = self.headers.get('Range', '')
+        if range_header.startswith('bytes='):
+            start = int(range_header[6:].split('-')[0] or 0)
+            if start >= len(body):
+                self._send_empty(416, {'Content-Range': f"bytes */{len(body)}"})
+                return
+            status = 206
+
+        payload = body[start:]
+        self.send_response(status)
+        self.send_header('Content-Type', entry['content_type'])
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('ETag', etag)
+        self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range', f"bytes {start}-{len(body) - 1}/{len(body)}")
+        self.end_headers()
+
+        is_pdf = 'pdf' in entry['content_type'] or self.path.endswith('.pdf')
+        server.count(pdf=int(is_pdf), html=int(not is_pdf))
+        drop_at = len(payload) // 2 if random.random() < server.drop_rate else None
+        for offset in range(0, len(payload), self.chunk_size):
+            if drop_at is not None and offset >= drop_at:
+                server.count(errors=1)
+                self.close_connection = True
+                return
+            chunk = payload[offset:offset + self.chunk_size]
+            try:
+                self.wfile.write(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True  # 客户端取消下载
+                return
+            server.count(bytes=len(chunk))
+            if server.bandwidth:
+                time.sleep(len(chunk) / server.bandwidth)
+
+def create_replay_session(server, max_workers):
+    """创建请求被改写到回放服务器的会话"""
+    session = create_session(pool_maxsize=max_workers, adapter_class=ReplayAdapter)
+    adapter = session.get_adapter('http://')
+    adapter.replay_base = server.base_url
+    return session, adapter
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def fixture_jobs(store, args):
+    """命令行未指定时使用录制时的报纸和日期"""
+    meta = store.index.get('meta', {})
+    papers = args.papers or meta.get('papers') or list(NEWSPAPERS)
+    dates = [args.date] if args.date else [parse_date(value) for value in meta.get('dates', [])]
+    return papers, dates
+
+def run_record(args):
+    os.makedirs(args.fixtures, exist_ok=True)
+    store = FixtureStore(args.fixtures)
+    output = tempfile.mkdtemp(prefix='newspaper_record_')
+    try:
+        session = create_session(pool_maxsize=args.concurrency)
+        session.hooks['response'].append(store.recording_hook)
+        engine = DownloadEngine(args.papers, [args.date], output,
+                                max_workers=args.concurrency, session=session)
+        exit_code = run_engine(engine)
+    finally:
+        shutil.rmtree(output, ignore_errors=True)
+
+    store.index['meta'] = {
+        'papers': args.papers,
+        'dates': [args.date.strftime("%Y-%m-%d")],
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    store.write_index()
+    print_log(f"已录制 {len(store.index['responses'])} 个响应到 {args.fixtures}")
+    return exit_code
+
+def start_replay_server(args):
+    store = FixtureStore(args.fixtures)
+    if not store.index['responses']:
+        raise SystemExit(f"{args.fixtures} 中没有录制的响应，请先运行 record")
+    return ReplayServer(store, args.port, args.latency, args.bandwidth * 1024,
+                        args.error_rate, args.drop_rate).start()
+
+def run_serve(args):
+    server = start_replay_server(args)
+    print_log(f"回放服务器已启动：{server.base_url}/{{scheme}}/{{host}}/{{path}}，Ctrl+C退出")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+def bench_engine(server, papers, dates, max_workers, engine_name, verbose):
+    """在回放服务器上完整运行一次下载，返回统计结果"""
+    server.reset_stats()
+    session, adapter = create_replay_session(server, max_workers)
+    output = tempfile.mkdtemp(prefix='newspaper_bench_')
+    try:
+        engine = DownloadEngine(papers, dates, output, max_workers=max_workers, engine=engine_name,
+                                log=print_log if verbose else (lambda message: None), session=session)
+        start = time.perf_counter()
+        engine.run()
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(output, ignore_errors=True)
+        session.close()
+
+    stats = dict(server.stats)
+    return {
+        'concurrency': max_workers,
+        'seconds': elapsed,
+        'pages_per_sec': stats['pdf'] / elapsed if elapsed else 0.0,
+        'mb_per_sec': stats['bytes'] / elapsed / (1024 * 1024) if elapsed else 0.0,
+        'ttfb_p50': percentile(adapter.ttfb, 0.50),
+        'ttfb_p95': percentile(adapter.ttfb, 0.95),
+        'ttfb_p99': percentile(adapter.ttfb, 0.99),
+        'requests': stats['requests'],
+        'errors': stats['errors'],
+        'failed': engine.failed_count,
+    }
+
+def run_bench(args):
+    server = start_replay_server(args)
+    papers, dates = fixture_jobs(server.store, args)
+    if not dates:
+        raise SystemExit("录制信息中没有日期，请使用 --date 指定")
+
+    print(f"报纸: {', '.join(papers)}  日期: {', '.join(d.strftime('%Y-%m-%d') for d in dates)}")
+    print(f"延迟 {args.latency}s  带宽 {args.bandwidth or '不限'} KB/s  "
+          f"错误率 {args.error_rate}  断连率 {args.drop_rate}")
+    print(f"{'并发':>4} {'耗时s':>8} {'版面/秒':>8} {'MB/s':>8} {'TTFB p50':>9} "
+          f"{'p95':>8} {'p99':>8} {'请求':>6} {'注入错误':>8} {'失败':>4}")
+    try:
+        for max_workers in args.concurrency:
+            result = bench_engine(server, papers, dates, max_workers, 'thread', args.verbose)
+            print(f"{result['concurrency']:>4} {result['seconds']:>8.2f} {result['pages_per_sec']:>8.2f} "
+                  f"{result['mb_per_sec']:>8.2f} {result['ttfb_p50'] * 1000:>7.1f}ms "
+                  f"{result['ttfb_p95'] * 1000:>6.1f}ms {result['ttfb_p99'] * 1000:>6.1f}ms "
+                  f"{result['requests']:>6} {result['errors']:>8} {result['failed']:>4}")
+    finally:
+        server.shutdown()
+    return 0
+
+def bench_parse(pages, backend, repeat):
+    """解析每个页面并执行全部选择器，返回平均每页耗时（秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in pages:
+            document = parse_html(text, backend)
+            for selector in SCRAPER_SELECTORS:
+                for node in document.select(selector):
+                    node.text
+    return (time.perf_counter() - start) / (repeat * len(pages))
+
+def run_parse_bench(args):
+    pages = []
+    for path in args.files:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            pages.append(f.read())
+
+    backends = args.backends or available_html_backends()
+    results = {backend: bench_parse(pages, backend, args.repeat) for backend in backends}
+    baseline = results.get('html.parser')
+
+    print(f"{len(pages)} 个页面，每个后端重复 {args.repeat} 次")
+    for backend, seconds in sorted(results.items(), key=lambda item: item[1]):
+        speedup = f"  {baseline / seconds:.1f}x" if baseline else ""
+        print(f"{backend:<12} {seconds * 1000:8.2f} ms/页{speedup}")
+    return 0
+
+# 生成标题用的字符：常见汉字、标点、各平台文件名不允许的字符和空白
+TITLE_CHARS = '要闻评论国内国际经济社会文化体育科技观点专题 ：，、·-（）/\\:*?"<>|\t\n'
+
+def random_titles(count, seed=0, unsafe_rate=0.1):
+    """生成(版面号, 版面标题, 链接)列表，约5%的版面重复出现，unsafe_rate比例的标题含非法字符"""
+    rng = random.Random(seed)
+    safe_chars = TITLE_CHARS[:TITLE_CHARS.index('/')]
+    titles = []
+    for index in range(count):
+        if titles and rng.random() < 0.05:
+            page_num, page_title, _ = rng.choice(titles)
+        else:
+            page_num = str(rng.randint(1, 24))
+            chars = TITLE_CHARS if rng.random() < unsafe_rate else safe_chars
+            page_title = ''.join(rng.choice(chars) for _ in range(rng.randint(0, 30)))
+        titles.append((page_num, page_title, f"https://example.com/{index}.pdf"))
+    return titles
+
+def naive_format_title(newspaper, date, page_num, page_title):
+    """对照组：每个非法字符单独替换"""
+    title = f"{newspaper}_{date.strftime('%Y%m%d')}_第{page_num.zfill(2)}版_{page_title}"
+    for char in '/\\:*?"<>|\t\n':
+        title = title.replace(char, '_')
+    return title.strip('_')
+
+def run_titles_bench(args):
+    titles = random_titles(args.count, unsafe_rate=args.unsafe_rate)
+    date = datetime(2025, 1, 16)
+    downloader = NewspaperDownloader(log=lambda message: None)
+
+    start = time.perf_counter()
+    naive = [(naive_format_title('人民日报', date, num, title), url) for num, title, url in titles]
+    naive_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    links = dedupe_links([
+        (downloader._format_title('人民日报', date, num, title), url) for num, title, url in titles
+    ])
+    seconds = time.perf_counter() - start
+
+    # 对照组中同名（不区分大小写）的文件会互相覆盖或重复下载
+    overwritten = len(naive) - len({title.casefold() for title, _ in naive})
+    print(f"{args.count} 个标题，{args.unsafe_rate:.0%} 含非法字符")
+    print(f"逐字符替换        {naive_seconds / args.count * 1e6:8.2f} µs/个，重名 {overwritten} 个")
+    print(f"预编译规范化+去重 {seconds / args.count * 1e6:8.2f} µs/个，重名 0 个")
+    print(f"最长文件名 {max(len(title.encode('utf-8')) for title, _ in links)} 字节")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m newspaper_bench', description='报纸下载基准测试')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_cmd = subparsers.add_parser('record', help='从真实站点录制版面页面和PDF')
+    record_cmd.add_argument('-p', '--papers', nargs='+', choices=list(NEWSPAPERS),
+                            default=list(NEWSPAPERS), help='要录制的报纸，默认全部')
+    record_cmd.add_argument('-d', '--date', type=parse_date, required=True, help='录制日期 YYYY-MM-DD')
+    record_cmd.add_argument('--fixtures', required=True, help='录制文件保存目录')
+    record_cmd.add_argument('-j', '--concurrency', type=parse_positive_int, default=10, help='并发下载数，默认10')
+    record_cmd.set_defaults(func=run_record)
+
+    for name, help_text, func in [('serve', '启动本地回放服务器', run_serve),
+                                  ('run', '在回放服务器上对下载器进行基准测试', run_bench)]:
+        cmd = subparsers.add_parser(name, help=help_text)
+        cmd.add_argument('--fixtures', required=True, help='录制文件目录')
+        cmd.add_argument('--port', type=int, default=0, help='监听端口，默认随机')
+        cmd.add_argument('--latency', type=float, default=0.0, help='首字节延迟秒数')
+        cmd.add_argument('--bandwidth', type=int, default=0, help='单连接带宽KB/s，默认不限')
+        cmd.add_argument('--error-rate', type=float, default=0.0, help='返回503的概率')
+        cmd.add_argument('--drop-rate', type=float, default=0.0, help='传输中途断开的概率')
+        cmd.set_defaults(func=func)
+        if name == 'run':
+            cmd.add_argument('-j', '--concurrency', type=parse_positive_int, nargs='+', default=[1, 5, 10, 20],
+                             help='要测试的并发数列表')
+            cmd.add_argument('-p', '--papers', nargs='+', choices=list(NEWSPAPERS),
+                             help='要测试的报纸，默认录制时的报纸')
+            cmd.add_argument('-d', '--date', type=parse_date, help='日期，默认录制时的日期')
+            cmd.add_argument('-v', '--verbose', action='store_true', help='输出下载日志')
+
+    parse_cmd = subparsers.add_parser('parse', help='HTML解析后端微基准测试')
+    parse_cmd.add_argument('files', nargs='+', help='保存的版面HTML文件')
+    parse_cmd.add_argument('--repeat', type=int, default=20, help='重复次数，默认20')
+    parse_cmd.add_argument('--backends', nargs='+', choices=available_html_backends(),
+                           help='要测试的后端，默认全部已安装后端')
+    parse_cmd.set_defaults(func=run_parse_bench)
+
+    titles_cmd = subparsers.add_parser('titles', help='标题规范化与去重基准测试')
+    titles_cmd.add_argument('--count', type=int, default=100000, help='标题数量，默认100000')
+    titles_cmd.add_argument('--unsafe-rate', type=float, default=0.1,
+                            help='含非法字符的标题比例，默认0.1')
+    titles_cmd.set_defaults(func=run_titles_bench)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
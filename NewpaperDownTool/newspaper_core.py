@@ -0,0 +1,2068 @@
+"""
+报纸下载核心模块 (Newspaper Download Core)
+功能：报纸链接获取与并发下载，不依赖PyQt6，可在服务器上通过命令行运行
+用法：python -m newspaper_core -p people economic -d 2025-01-16 -o ~/Downloads
+作者：s-Ruthless
+创建时间：2025-01-16
+最后修改：2025-01-16
+版本：1.0
+"""
+
+import os
+import sys
+import re
+import socket
+import json
+import hashlib
+import sqlite3
+import threading
+import asyncio
+import time
+import heapq
+import itertools
+import argparse
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from datetime import datetime, timedelta
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from functools import partial
+from contextlib import ExitStack, contextmanager
+from collections import deque, namedtuple
+from urllib.parse import urlsplit, urljoin
+from importlib.util import find_spec
+
+def _installed(name):
+    """只检查模块是否安装，不导入"""
+    try:
+        return find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+# 可选依赖在导入时只检查是否安装，用到时才导入，线程引擎不合并时启动不受影响
+HAS_AIOHTTP = _installed('aiohttp')        # 异步下载引擎
+HAS_PYPDF = _installed('pypdf')            # 合并整份报纸PDF
+HAS_SELECTOLAX = _installed('selectolax')  # C实现的HTML解析器，未安装时回退到html.parser
+HAS_LXML = _installed('lxml')              # BeautifulSoup的lxml解析器
+
+# 禁用 urllib3 的警告信息
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# 未完成下载的临时文件后缀
+PART_SUFFIX = '.part'
+# Content-Range: bytes 100-199/200 或 bytes */200
+CONTENT_RANGE_RE = re.compile(r'bytes\s+(?:(?P<start>\d+)-\d+|\*)/(?P<total>\d+|\*)')
+# PDF校验只读取文件头尾：%PDF- 允许出现在前1024字节内，startxref和%%EOF在末尾2048字节内查找
+PDF_HEADER_WINDOW = 1024
+PDF_TRAILER_WINDOW = 2048
+STARTXREF_RE = re.compile(rb'startxref\s+(\d+)\s+%%EOF')
+XREF_START_RE = re.compile(rb'\s*(?:xref|\d+\s+\d+\s+obj)')
+
+# 文件名中各平台不允许的字符替换为对应的全角字符，其余控制字符删除
+FILENAME_TRANSLATION = str.maketrans({
+    '/': '／', '\\': '＼', ':': '：', '*': '＊', '?': '？',
+    '"': '＂', '<': '＜', '>': '＞', '|': '｜',
+    **{chr(code): None for code in range(32)},
+})
+WHITESPACE_RE = re.compile(r'\s+')
+# 需要处理的字符：非法字符、控制字符、空格以外的空白（如全角空格）和连续空格，多数标题不含这些字符
+UNSAFE_FILENAME_RE = re.compile(r'[\x00-\x1f/\\:*?"<>|]|[^\S ]| {2}')
+FILENAME_MAX_BYTES = 200  # 多数文件系统限制255字节，为.pdf.part等后缀预留空间
+
+# 统一的headers配置
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/pdf,text/html,*/*',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    'Connection': 'keep-alive'
+}
+
+# 报纸站点配置，由NewspaperDownloader.get_links统一执行
+# index_url:      版面目录页地址，{date}为日期，可使用 {date:%Y%m} 等格式
+# page_selector:  目录页中每个版面条目的选择器
+# title_selector: 条目中包含版面号和标题的元素，缺省为条目本身
+# title_pattern:  从标题文本中提取 num（版面号）和 title（版面标题）的正则
+# default_titles: 标题为空时按版面号使用的默认标题
+# pdf_rules:      按顺序尝试的PDF地址规则，前面的规则无需额外请求：
+#     template  直接由日期和版面号生成地址
+#     link      从目录页条目中的链接生成地址
+#     follow    访问版面页面后在其中查找链接（需要额外请求，放在最后）
+# 地址模板可用变量：date、num（原始版面号）、num2（两位版面号）、href（链接值）、filename（链接文件名）
+SITE_PROFILES = {
+    'people': {
+        'name': '人民日报',
+        'index_url': 'http://paper.people.com.cn/rmrb/pc/layout/{date:%Y%m}/{date:%d}/node_01.html',
+        'page_selector': 'div.swiper-slide a#pageLink',
+        'title_pattern': re.compile(r'^(?P<num>.*?)版：(?P<title>.*)$', re.S),
+        'pdf_rules': [
+            {'type': 'follow', 'attr': 'href',
+             'selector': 'a[href*="attachement"][href$=".pdf"]',
+             'url': 'http://paper.people.com.cn/rmrb/pc/attachement/{date:%Y%m}/{date:%d}/{filename}'},
+        ],
+    },
+    'economic': {
+        'name': '经济日报',
+        'index_url': 'http://paper.ce.cn/pc/layout/{date:%Y%m}/{date:%d}/node_01.html',
+        'page_selector': 'ul#layoutlist li.posRelative',
+        'title_selector': 'a:not(.pdf)',
+        'title_pattern': re.compile(r'第(?P<num>[^版]*)版.*?：(?P<title>.*)$', re.S),
+        'pdf_rules': [
+            {'type': 'link', 'selector': 'input[type="hidden"]', 'attr': 'value',
+             'strip_prefix': '../../../', 'url': 'http://paper.ce.cn/pc/{href}'},
+        ],
+    },
+    'legal': {
+        'name': '法治日报',
+        'index_url': 'http://epaper.legaldaily.com.cn/fzrb/content/{date:%Y%m%d}/Page01TB.htm',
+        'page_selector': 'td a.atitle',
+        'title_pattern': re.compile(r'^(?P<num>[^:]+):(?P<title>.*)$', re.S),
+        'pdf_rules': [
+            {'type': 'template', 'url': 'http://epaper.legaldaily.com.cn/fzrb/PDF/{date:%Y%m%d}/{num2}.pdf'},
+        ],
+    },
+    'worker': {
+        'name': '工人日报',
+        'index_url': 'https://www.workercn.cn/papers/grrb/{date:%Y/%m/%d}/1/page.html',
+        'page_selector': 'ul#pageUrl li',
+        'title_selector': 'a:not(.pdf)',
+        'title_pattern': re.compile(r'^(?P<num>.+)$', re.S),
+        'default_titles': {'1': '头版'},
+        'pdf_rules': [
+            {'type': 'link', 'selector': 'a.pdf', 'attr': 'href', 'url': 'https://www.workercn.cn{href}'},
+        ],
+    },
+    'science': {
+        'name': '科技日报',
+        'index_url': 'https://digitalpaper.stdaily.com/http_www.kjrb.com/kjrb/html/{date:%Y-%m/%d}/node_2.htm',
+        'page_selector': 'div.bmname div a#pageLink',
+        'title_pattern': re.compile(r'第(?P<num>[^版]*)版[^：]*：(?P<title>.*)$', re.S),
+        'pdf_rules': [
+            {'type': 'template',
+             'url': 'https://digitalpaper.stdaily.com/http_www.kjrb.com/kjrb/images/'
+                    '{date:%Y-%m/%d}/{num}/KJRB{date:%Y%m%d}{num}.pdf'},
+        ],
+    },
+    'xinhua': {
+        'name': '新华日报',
+        'index_url': 'https://xh.xhby.net/pc/layout/{date:%Y%m}/{date:%d}/node_1.html',
+        'page_selector': 'div.Chunkiconlist p',
+        'title_selector': 'a:first-child',
+        'title_pattern': re.compile(r'第(?P<num>[^版]*)版.*?：(?P<title>.*)$', re.S),
+        'pdf_rules': [
+            {'type': 'link', 'selector': 'a[href$=".pdf"]', 'attr': 'href',
+             'strip_prefix': '../../../', 'url': 'https://xh.xhby.net/pc/{href}'},
+        ],
+    },
+}
+
+# 报纸类型 -> 报纸名称
+NEWSPAPERS = {newspaper_type: profile['name'] for newspaper_type, profile in SITE_PROFILES.items()}
+
+class SelectolaxNode:
+    """将selectolax节点包装为爬虫使用的BeautifulSoup接口子集"""
+    __slots__ = ('node',)
+
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, selector):
+        return [SelectolaxNode(node) for node in self.node.css(selector)]
+
+    def select_one(self, selector):
+        node = self.node.css_first(selector)
+        return SelectolaxNode(node) if node is not None else None
+
+    @property
+    def text(self):
+        return self.node.text(deep=True)
+
+    @property
+    def attrs(self):
+        return {name: value or '' for name, value in self.node.attributes.items()}
+
+    def get(self, name, default=None):
+        attributes = self.node.attributes
+        if name not in attributes:
+            return default
+        return attributes[name] or ''
+
+    def __getitem__(self, name):
+        return self.attrs[name]
+
+def available_html_backends():
+    """返回已安装的HTML解析后端，按速度从快到慢排列"""
+    backends = []
+    if HAS_SELECTOLAX:
+        backends.append('selectolax')
+    if HAS_LXML:
+        backends.append('lxml')
+    backends.append('html.parser')
+    return backends
+
+# 默认使用最快的已安装后端
+HTML_BACKEND = available_html_backends()[0]
+
+def parse_html(text, backend=None):
+    """解析HTML，返回支持select/select_one/text/get的文档对象"""
+    backend = backend or HTML_BACKEND
+    if backend == 'selectolax':
+        from selectolax.lexbor import LexborHTMLParser
+        return SelectolaxNode(LexborHTMLParser(text).root)
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(text, backend)
+
+def sanitize_filename(name):
+    """将抓取的标题转换为各平台都能写入的文件名（不含扩展名）"""
+    if UNSAFE_FILENAME_RE.search(name):
+        name = WHITESPACE_RE.sub(' ', name).translate(FILENAME_TRANSLATION)
+    name = name.strip(' ._')
+    # UTF-8每个字符最多4字节，短标题无需编码检查长度
+    if len(name) * 4 > FILENAME_MAX_BYTES:
+        encoded = name.encode('utf-8')
+        if len(encoded) > FILENAME_MAX_BYTES:
+            name = encoded[:FILENAME_MAX_BYTES].decode('utf-8', 'ignore').rstrip(' ._')
+    return name
+
+def dedupe_links(links):
+    """去掉重复的PDF链接，不同链接的同名标题依次加 _2、_3 后缀
+
+    按不区分大小写比较，避免在Windows和macOS上互相覆盖。
+    """
+    seen_urls = set()
+    used_names = set()
+    result = []
+    for title, url in links:
+        if url in seen_urls:
+            continue
+        seen_urls.add(url)
+        name, suffix = title, 1
+        while name.casefold() in used_names:
+            suffix += 1
+            name = f"{title}_{suffix}"
+        used_names.add(name.casefold())
+        result.append((name, url))
+    return result
+
+def print_log(message):
+    """命令行模式的日志输出"""
+    current_time = datetime.now().strftime("%H:%M:%S")
+    print(f"[{current_time}] {message}", flush=True)
+
+def abort_response(response):
+    """从其他线程中断requests流式响应：关闭底层socket，使阻塞中的读取立即出错返回"""
+    fp = getattr(getattr(response.raw, '_fp', None), 'fp', None)
+    sock = getattr(getattr(fp, 'raw', None), '_sock', None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """为未指定timeout的请求提供默认的(连接, 读取)超时"""
+
+    def __init__(self, *args, timeout=None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+def create_session(pool_maxsize=10, retries=3, backoff_factor=0.5,
+                   connect_timeout=5, read_timeout=30, adapter_class=TimeoutHTTPAdapter):
+    """创建链接获取和文件下载共用的HTTP会话
+
+    每个站点一个keep-alive连接池，pool_maxsize为单个站点的最大连接数；
+    GET/HEAD请求在连接错误和502/503/504时按指数退避重试。
+    """
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False,  # 重试耗尽后返回最后的响应，由调用方和限流器处理
+    )
+    adapter = adapter_class(
+        pool_connections=len(NEWSPAPERS) * 2,  # 缓存的站点连接池数量
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+        timeout=(connect_timeout, read_timeout),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+class HostThrottle:
+    """单个站点的限流状态：并发上限、令牌桶速率和延迟统计"""
+
+    def __init__(self, limit, rate):
+        self.limit = float(limit)   # 并发上限（按AIMD调整，取整后生效）
+        self.rate = float(rate)     # 令牌桶速率（请求/秒）
+        self.tokens = float(rate)   # 当前令牌数，初始允许一秒的突发
+        self.updated = time.monotonic()
+        self.active = 0             # 正在进行的请求数
+        self.base_latency = None    # 观察到的最低首字节延迟
+        self.latency = None         # 首字节延迟的指数平均
+        self.blocked_until = 0.0    # 被限流后的冷却截止时间
+
+class HostLimiter:
+    """按站点的自适应限流器
+
+    成功且延迟正常时逐步提高并发和速率（加性增），遇到429/5xx或超时
+    时减半并进入冷却（乘性减），使多份报纸同时下载时各站点都不被封禁。
+    线程和asyncio两种下载引擎共用同一个限流器。
+    """
+    STATUS_THROTTLED = {429, 500, 502, 503, 504}
+
+    def __init__(self, initial_limit=4, max_limit=10, initial_rate=8.0,
+                 min_rate=0.5, max_rate=50.0, backoff=5.0):
+        self.initial_limit = initial_limit
+        self.max_limit = max(1, max_limit)
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.backoff = backoff  # 被限流后的默认冷却秒数
+        self.hosts = {}
+        self.condition = threading.Condition()
+
+    @staticmethod
+    def host_of(url):
+        return urlsplit(url).netloc.lower()
+
+    def _throttle(self, host):
+        throttle = self.hosts.get(host)
+        if throttle is None:
+            throttle = HostThrottle(min(self.initial_limit, self.max_limit), self.initial_rate)
+            self.hosts[host] = throttle
+        return throttle
+
+    def try_acquire(self, host):
+        """尝试占用一个请求名额，成功返回0，否则返回建议等待的秒数"""
+        with self.condition:
+            throttle = self._throttle(host)
+            now = time.monotonic()
+            # 桶容量至少为1，速率降到1以下时仍能攒够一个令牌，否则站点会永久饿死
+            throttle.tokens = min(max(1.0, throttle.rate),
+                                  throttle.tokens + (now - throttle.updated) * throttle.rate)
+            throttle.updated = now
+
+            if now < throttle.blocked_until:
+                return throttle.blocked_until - now
+            if throttle.active >= max(1, int(throttle.limit)):
+                return 0.05
+            if throttle.tokens < 1:
+                return (1 - throttle.tokens) / throttle.rate
+
+            throttle.tokens -= 1
+            throttle.active += 1
+            return 0
+
+    def acquire(self, url, stop_event=None):
+        """阻塞直到获得请求名额，返回站点标识；stop_event被设置时返回None"""
+        host = self.host_of(url)
+        while stop_event is None or not stop_event.is_set():
+            wait = self.try_acquire(host)
+            if not wait:
+                return host
+            with self.condition:
+                # 在锁内再次检查，避免stop()的wake()发生在检查和等待之间而被错过
+                if stop_event is None or not stop_event.is_set():
+                    self.condition.wait(wait)
+        return None
+
+    def wake(self):
+        """唤醒所有等待名额的线程，使其重新检查取消信号"""
+        with self.condition:
+            self.condition.notify_all()
+
+    async def acquire_async(self, url, stop_event=None):
+        """异步等待请求名额，返回站点标识；stop_event被设置时返回None"""
+        host = self.host_of(url)
+        while stop_event is None or not stop_event.is_set():
+            wait = self.try_acquire(host)
+            if not wait:
+                return host
+            await asyncio.sleep(wait)
+        return None
+
+    def release(self, host, status=None, latency=None, error=False, retry_after=None):
+        """释放请求名额并根据结果调整限流参数
+
+        status为HTTP状态码，latency为首字节延迟（秒），error表示超时或连接错误。
+        """
+        with self.condition:
+            throttle = self._throttle(host)
+            throttle.active = max(0, throttle.active - 1)
+
+            if error or status in self.STATUS_THROTTLED:
+                # 乘性减：并发和速率减半，并冷却一段时间
+                throttle.limit = max(1.0, throttle.limit / 2)
+                throttle.rate = max(self.min_rate, throttle.rate / 2)
+                throttle.tokens = min(throttle.tokens, 0.0)
+                cooldown = retry_after if retry_after is not None else self.backoff
+                throttle.blocked_until = max(throttle.blocked_until, time.monotonic() + cooldown)
+            elif status is not None and status < 400 and latency is not None:
+                if throttle.base_latency is None or latency < throttle.base_latency:
+                    throttle.base_latency = latency
+                throttle.latency = latency if throttle.latency is None else 0.8 * throttle.latency + 0.2 * latency
+                # 加性增：平均延迟不超过最低延迟的两倍时视为健康
+                if throttle.latency <= 2 * throttle.base_latency + 0.05:
+                    throttle.limit = min(float(self.max_limit), throttle.limit + 1 / throttle.limit)
+                    throttle.rate = min(self.max_rate, throttle.rate * 1.1)
+            self.condition.notify_all()
+
+    @staticmethod
+    def retry_after(headers):
+        """解析Retry-After头中的秒数"""
+        value = headers.get('Retry-After', '')
+        return float(value) if value.isdigit() else None
+
+class HostDispatcher:
+    """按站点排队的下载分发器
+
+    每个站点一个任务队列，限流器给出名额（try_acquire成功）且线程池有空闲线程时
+    才把任务提交到线程池，线程池中的线程从不等待站点名额：某个站点达到并发上限
+    或被限流冷却时，其他站点的任务仍能用满全部线程。
+    """
+
+    def __init__(self, executor, limiter, max_workers, stop_event):
+        self.executor = executor
+        self.limiter = limiter
+        self.max_workers = max_workers
+        self.stop_event = stop_event
+        # 与限流器共用条件变量，release()释放名额和wake()取消时都会唤醒分发线程
+        self.condition = limiter.condition
+        self.queues = {}  # 站点 -> 等待名额的任务队列
+        self.delayed = []  # (可执行时间, 序号, 站点, 任务)的最小堆，重试退避期间的任务
+        self.counter = itertools.count()
+        self.running = 0  # 已提交到线程池尚未结束的任务数
+        self.closed = False
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def put(self, url, task, delay=0):
+        """排队一个任务，delay秒后才参与分发；task(host)在线程池中以已占用的名额调用"""
+        host = self.limiter.host_of(url)
+        with self.condition:
+            if delay > 0:
+                heapq.heappush(self.delayed, (time.monotonic() + delay, next(self.counter), host, task))
+            else:
+                self.queues.setdefault(host, deque()).append(task)
+            self.condition.notify_all()
+
+    def close(self):
+        """停止分发线程，取消时未分发的任务直接丢弃"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+
+    def _loop(self):
+        with self.condition:
+            while not self.closed and not self.stop_event.is_set():
+                self.condition.wait(self._dispatch())
+
+    def _dispatch(self):
+        """提交所有已获得名额的任务，返回下次检查前的等待秒数，None表示等待通知"""
+        now = time.monotonic()
+        while self.delayed and self.delayed[0][0] <= now:
+            _, _, host, task = heapq.heappop(self.delayed)
+            self.queues.setdefault(host, deque()).append(task)
+        wait = self.delayed[0][0] - now if self.delayed else None
+
+        # 各站点轮流提交一个任务，避免任务多的站点占满线程池
+        submitted = True
+        while submitted and self.running < self.max_workers:
+            submitted = False
+            for host, queue in list(self.queues.items()):
+                if not queue:
+                    del self.queues[host]
+                    continue
+                if self.running >= self.max_workers:
+                    break
+                delay = self.limiter.try_acquire(host)
+                if delay:
+                    wait = delay if wait is None else min(wait, delay)
+                    continue
+                self._submit(host, queue.popleft())
+                submitted = True
+        return wait
+
+    def _submit(self, host, task):
+        self.running += 1
+        try:
+            future = self.executor.submit(task, host)
+        except RuntimeError:  # 线程池已关闭
+            self.running -= 1
+            self.limiter.release(host)
+            return
+        future.add_done_callback(self._task_done)
+
+    def _task_done(self, future):
+        with self.condition:
+            self.running -= 1
+            self.condition.notify_all()
+
+class NewspaperDownloader:
+    """报纸PDF链接获取器，log为接收进度消息的回调函数"""
+    
+    def __init__(self, log=print_log, limiter=None, session=None, stop_event=None):
+        self.log = log
+        self.limiter = limiter or HostLimiter()
+        self.download_folder = ""
+        self.headers = DEFAULT_HEADERS
+        # 与下载共用会话时，版面页面和PDF复用同一批TCP/TLS连接
+        self.session = session or create_session(read_timeout=10)
+        self.page_workers = 8  # 版面页面并发抓取数
+        self.html_backend = HTML_BACKEND  # HTML解析后端
+        self.stop_event = stop_event or threading.Event()  # 设置后在版面之间停止获取
+
+    def _fetch(self, url):
+        """经站点限流器获取页面，失败时抛出异常"""
+        host = self.limiter.acquire(url, self.stop_event)
+        if host is None:
+            raise RuntimeError("已取消")
+        start = time.monotonic()
+        try:
+            response = self.session.get(url)
+        except requests.RequestException:
+            self.limiter.release(host, error=True)
+            raise
+        self.limiter.release(
+            host, response.status_code, time.monotonic() - start,
+            retry_after=self.limiter.retry_after(response.headers)
+        )
+        response.raise_for_status()
+        response.encoding = 'utf-8'
+        return response
+
+    def _get_page_content(self, url):
+        """统一的页面获取方法"""
+        try:
+            return self._fetch(url).text
+        except Exception as e:
+            self.log(f"获取页面失败: {str(e)}")
+            return None
+
+    def _format_title(self, newspaper, date, page_num, page_title=""):
+        """统一的标题格式化方法，结果可直接用作文件名"""
+        date_str = date.strftime("%Y%m%d")
+        page_num = page_num.zfill(2)
+        return sanitize_filename(f"{newspaper}_{date_str}_第{page_num}版_{page_title}")
+
+    def _parse_entry(self, profile, item):
+        """从目录页条目中提取(版面号, 版面标题)，不符合格式时返回None"""
+        title_selector = profile.get('title_selector')
+        title_node = item.select_one(title_selector) if title_selector else item
+        if title_node is None:
+            return None
+        match = profile['title_pattern'].search(title_node.text.strip())
+        if not match:
+            return None
+        page_num = match.group('num').strip()
+        page_title = (match.groupdict().get('title') or '').strip()
+        if not page_title:
+            page_title = profile.get('default_titles', {}).get(page_num, '')
+        return page_num, page_title
+
+    @staticmethod
+    def _rule_url(rule, node, date, page_num):
+        """按规则生成PDF地址，节点中缺少所需链接时返回None"""
+        href = ''
+        if rule['type'] != 'template':
+            link = node.select_one(rule['selector']) if node is not None else None
+            href = link.get(rule['attr']) if link is not None else None
+            if not href:
+                return None
+            prefix = rule.get('strip_prefix')
+            if prefix and href.startswith(prefix):
+                href = href[len(prefix):]
+        return rule['url'].format(
+            date=date, num=page_num, num2=page_num.zfill(2),
+            href=href, filename=href.split('/')[-1]
+        )
+
+    def _follow_page(self, rule, page_url, date, page_num):
+        """访问版面页面并按规则查找PDF地址"""
+        if self.stop_event.is_set():
+            return None
+        try:
+            page = parse_html(self._fetch(page_url).text, self.html_backend)
+            return self._rule_url(rule, page, date, page_num)
+        except Exception as e:
+            self.log(f"处理版面出错: {str(e)}")
+            return None
+
+    def _resolve_entry(self, profile, index_url, item, date, page_num):
+        """依次尝试PDF规则，返回(PDF地址, 需要访问的版面页面地址, follow规则)"""
+        for rule in profile['pdf_rules']:
+            if rule['type'] == 'follow':
+                page_href = item.get(rule['attr'])
+                if page_href:
+                    return None, urljoin(index_url, page_href), rule
+                continue
+            pdf_url = self._rule_url(rule, None if rule['type'] == 'template' else item, date, page_num)
+            if pdf_url:
+                return pdf_url, None, None
+        return None, None, None
+
+    def get_links(self, newspaper_type, date):
+        """按站点配置获取报纸PDF链接，返回按版面顺序排列的(标题, PDF链接)列表"""
+        return self.find_links(newspaper_type, date)[0]
+
+    def find_links(self, newspaper_type, date):
+        """与get_links相同，但返回(链接列表, 未获取到PDF地址的版面数)
+
+        版面页面获取失败的条目不会出现在链接列表中，未获取数大于0说明结果不完整。
+        """
+        profile = SITE_PROFILES[newspaper_type]
+        name = profile['name']
+        if self.stop_event.is_set():
+            return [], 0
+        try:
+            self.log(f"正在获取{name}版面...")
+            index_url = profile['index_url'].format(date=date)
+            document = parse_html(self._fetch(index_url).text, self.html_backend)
+            items = document.select(profile['page_selector'])
+            
+            if not items:
+                self.log("未找到版面信息")
+                return [], 0
+
+            # 先用无需额外请求的规则解析，剩余条目再并发访问版面页面
+            resolved = []
+            pending = []
+            for item in items:
+                if self.stop_event.is_set():
+                    return [], 0
+                try:
+                    entry = self._parse_entry(profile, item)
+                    if entry is None:
+                        continue
+                    pdf_url, page_url, rule = self._resolve_entry(profile, index_url, item, date, entry[0])
+                    if pdf_url or page_url:
+                        resolved.append([entry, pdf_url])
+                    if page_url:
+                        pending.append((len(resolved) - 1, rule, page_url, entry[0]))
+                except Exception as e:
+                    self.log(f"处理版面出错: {str(e)}")
+                    continue
+
+            if pending and not self.stop_event.is_set():
+                with ThreadPoolExecutor(max_workers=min(self.page_workers, len(pending))) as executor:
+                    pdf_urls = executor.map(
+                        lambda job: self._follow_page(job[1], job[2], date, job[3]), pending
+                    )
+                    for (position, _, _, _), pdf_url in zip(pending, pdf_urls):
+                        resolved[position][1] = pdf_url
+
+            if self.stop_event.is_set():
+                return [], 0
+            pdf_links = dedupe_links([
+                (self._format_title(name, date, page_num, page_title), pdf_url)
+                for (page_num, page_title), pdf_url in resolved if pdf_url
+            ])
+            unresolved = sum(1 for _, pdf_url in resolved if not pdf_url)
+            self.log(f"找到 {len(pdf_links)} 个版面")
+            if unresolved:
+                self.log(f"{unresolved} 个版面未获取到PDF地址")
+            return pdf_links, unresolved
+            
+        except Exception as e:
+            self.log(f"获取{name}版面出错: {str(e)}")
+            return [], 0
+
+def merge_pdfs(page_paths, output_path):
+    """按顺序合并PDF文件，先写入.part文件再原子重命名
+
+    pypdf的add_page会立即把页面及其内容流复制到writer中，内存占用随整份报纸的
+    大小增长；每次只合并一份报纸，同时合并的份数由DownloadEngine.merge_workers限制
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    part_path = output_path + PART_SUFFIX
+    writer = PdfWriter()
+    with ExitStack() as stack:
+        for path in page_paths:
+            reader = PdfReader(stack.enter_context(open(path, 'rb')))
+            for page in reader.pages:
+                writer.add_page(page)
+        with open(part_path, 'wb') as f:
+            writer.write(f)
+    writer.close()
+    os.replace(part_path, output_path)
+
+def validate_pdf(path, expected_size=None, check_xref=False):
+    """检查PDF文件是否完整，只读取文件头尾，返回(是否有效, 原因)
+
+    检查文件大小与Content-Length一致、%PDF文件头和%%EOF结尾；
+    check_xref时还检查startxref是否指向交叉引用表或交叉引用流。
+    """
+    size = os.path.getsize(path)
+    if expected_size is not None and size != expected_size:
+        return False, f"大小不符（{size}/{expected_size} 字节）"
+    with open(path, 'rb') as f:
+        head = f.read(PDF_HEADER_WINDOW)
+        header_offset = head.find(b'%PDF-')
+        if header_offset < 0:
+            return False, "缺少%PDF文件头，可能是错误页面"
+        f.seek(max(0, size - PDF_TRAILER_WINDOW))
+        tail = f.read()
+        if b'%%EOF' not in tail:
+            return False, "缺少%%EOF结尾，文件可能被截断"
+        if check_xref:
+            matches = STARTXREF_RE.findall(tail)
+            if not matches:
+                return False, "缺少startxref"
+            # 文件头前有多余字节时，部分PDF的偏移量以%PDF-为起点
+            for offset in {int(matches[-1]), int(matches[-1]) + header_offset}:
+                f.seek(offset)
+                if offset < size and XREF_START_RE.match(f.read(32)):
+                    break
+            else:
+                return False, "startxref未指向交叉引用表"
+    return True, ""
+
+def date_range(start, end, weekdays=None):
+    """生成[start, end]区间内的日期列表，weekdays为允许的星期集合(0为周一)"""
+    dates = []
+    current = start
+    while current <= end:
+        if weekdays is None or current.weekday() in weekdays:
+            dates.append(current)
+        current += timedelta(days=1)
+    return dates
+
+def format_size(size):
+    """将字节数格式化为便于阅读的大小"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.2f} GB"
+
+def format_duration(seconds):
+    """将秒数格式化为 MM:SS 或 HH:MM:SS"""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+# 单个文件的下载进度，total未知时为None
+FileProgress = namedtuple('FileProgress', ['filename', 'done', 'total'])
+
+class ProgressSnapshot(namedtuple('ProgressSnapshot', [
+        'files_total', 'files_done', 'files_failed', 'files_skipped',
+        'bytes_done', 'bytes_total', 'speed', 'eta', 'active'])):
+    """某一时刻的下载进度：文件数、字节数、速度（字节/秒）、剩余秒数（未知为None）和进行中的文件"""
+    __slots__ = ()
+
+    @property
+    def fraction(self):
+        """整体完成比例，进行中的文件按已下载字节折算"""
+        if not self.files_total:
+            return 0.0
+        partial_files = sum(f.done / f.total for f in self.active if f.total)
+        return min(1.0, (self.files_done + self.files_failed + partial_files) / self.files_total)
+
+    def __str__(self):
+        text = f"{self.files_done + self.files_failed}/{self.files_total} 个文件"
+        if self.files_failed:
+            text += f"（失败 {self.files_failed}）"
+        text += f"，{format_size(self.bytes_done)}，{format_size(self.speed)}/s"
+        if self.eta is not None:
+            text += f"，剩余 {format_duration(self.eta)}"
+        return text
+
+class DownloadProgress:
+    """线程安全的下载进度统计，按interval节流后以ProgressSnapshot调用回调
+
+    线程和asyncio两种下载引擎共用，每个数据块只做O(1)的计数，
+    回调在锁外调用，不会阻塞下载线程。
+    """
+
+    def __init__(self, callback=None, interval=0.25, window=5.0):
+        self.callback = callback
+        self.interval = interval  # 两次回调的最小间隔秒数
+        self.window = window      # 计算速度的滑动窗口秒数
+        self.lock = threading.Lock()
+        self.files_total = 0
+        self.files_done = 0
+        self.files_failed = 0
+        self.files_skipped = 0
+        self.finished = set()
+        self.active = {}          # 文件名 -> [已下载字节, 总大小]
+        self.bytes_done = 0       # 已写入磁盘的字节（含续传前已有部分）
+        self.bytes_total = 0      # 已知大小的文件总字节
+        self.finished_sizes = 0   # 已完成文件的字节数，用于估算未开始文件的大小
+        self.transferred = 0      # 本次实际传输的字节
+        self.samples = deque([(time.monotonic(), 0)])
+        self.last_emit = 0.0
+
+    def add_files(self, count):
+        with self.lock:
+            self.files_total += count
+        self.emit()
+
+    def start_file(self, filename, offset, total):
+        """文件开始接收数据，offset为续传前已有的字节数"""
+        with self.lock:
+            previous = self.active.pop(filename, None)
+            if previous:
+                self.bytes_done -= previous[0]
+                self.bytes_total -= previous[1] or 0
+            self.active[filename] = [offset, total]
+            self.bytes_done += offset
+            self.bytes_total += total or 0
+        self.emit()
+
+    def advance(self, filename, size):
+        """累计收到的数据块，每个流式块调用一次；节流判断在同一次加锁中完成"""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.active.get(filename)
+            if entry is not None:
+                entry[0] += size
+            self.bytes_done += size
+            self.transferred += size
+            if self.callback is None or now - self.last_emit < self.interval:
+                return
+            self.last_emit = now
+        self.callback(self.snapshot(now))
+
+    def finish_file(self, filename, success, skipped=False):
+        """文件结束（成功、失败或跳过），同一文件只统计一次"""
+        with self.lock:
+            if filename in self.finished:
+                return
+            self.finished.add(filename)
+            entry = self.active.pop(filename, None)
+            if success:
+                self.files_done += 1
+                if skipped:
+                    self.files_skipped += 1
+                elif entry:
+                    self.finished_sizes += entry[0]
+                    if entry[1] is None:
+                        self.bytes_total += entry[0]
+            else:
+                self.files_failed += 1
+                if entry:
+                    self.bytes_done -= entry[0]
+                    self.bytes_total -= entry[1] or 0
+        self.emit()
+
+    def _speed(self, now):
+        """滑动窗口内的平均速度，调用时需持有锁"""
+        self.samples.append((now, self.transferred))
+        while len(self.samples) > 2 and now - self.samples[1][0] >= self.window:
+            self.samples.popleft()
+        start, transferred = self.samples[0]
+        return (self.transferred - transferred) / (now - start) if now > start else 0.0
+
+    def snapshot(self, now=None):
+        now = now or time.monotonic()
+        with self.lock:
+            speed = self._speed(now)
+            active = tuple(FileProgress(name, done, total) for name, (done, total) in self.active.items())
+            # 剩余字节：已知大小的进行中文件 + 未开始文件按已完成文件的平均大小估算
+            remaining = sum(total - done for _, done, total in active if total)
+            transferred_files = self.files_done - self.files_skipped
+            waiting = self.files_total - self.files_done - self.files_failed - len(active)
+            eta = None
+            if waiting <= 0 or transferred_files:
+                if waiting > 0:
+                    remaining += waiting * self.finished_sizes / transferred_files
+                eta = remaining / speed if speed > 0 else None
+            return ProgressSnapshot(
+                self.files_total, self.files_done, self.files_failed, self.files_skipped,
+                self.bytes_done, self.bytes_total, speed, eta, active
+            )
+
+    def emit(self, force=False):
+        """距上次回调超过interval（或force）时发送进度快照"""
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        with self.lock:
+            if not force and now - self.last_emit < self.interval:
+                return
+            self.last_emit = now
+        self.callback(self.snapshot(now))
+
+class DownloadManifest:
+    """日期文件夹的下载清单，记录已下载文件的URL、大小、ETag/Last-Modified和校验值"""
+    FILENAME = '.manifest.json'
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, self.FILENAME)
+        self.lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        """先写临时文件再原子替换，避免中断时损坏清单"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def file_checksum(file_path, chunk_size=1024 * 1024):
+        """分块计算文件的SHA-256"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(partial(f.read, chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get(self, filename, url):
+        """返回与本地文件一致的清单记录，文件缺失、大小不符或URL变化时返回None"""
+        entry = self.entries.get(filename)
+        if not entry or entry.get('url') != url:
+            return None
+        try:
+            if os.path.getsize(os.path.join(self.folder, filename)) != entry.get('size'):
+                return None
+        except OSError:
+            return None
+        return entry
+
+    @staticmethod
+    def conditional_headers(entry):
+        """根据清单记录构建条件请求头"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record(self, filename, url, headers):
+        """记录下载完成的文件"""
+        file_path = os.path.join(self.folder, filename)
+        entry = {
+            'url': url,
+            'size': os.path.getsize(file_path),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'sha256': self.file_checksum(file_path),
+            'downloaded_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        with self.lock:
+            self.entries[filename] = entry
+            self._save()
+
+class LinkCache:
+    """链接获取结果的SQLite缓存：(报纸类型, 日期) -> [(标题, PDF链接)]
+
+    往期报纸不会变化，缓存永久有效；当天（及以后）的报纸可能陆续更新版面，
+    缓存在ttl秒后过期。空结果不缓存，以便报纸发布后重新获取。
+    """
+    FILENAME = '.link_cache.sqlite3'
+
+    def __init__(self, path, ttl=1800):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # 多个链接获取线程共用一个连接，由lock串行化
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS links ('
+                'paper TEXT NOT NULL, date TEXT NOT NULL, fetched_at REAL NOT NULL, '
+                'links TEXT NOT NULL, PRIMARY KEY (paper, date))'
+            )
+
+    def get(self, newspaper_type, date):
+        """返回有效的缓存链接列表，未缓存或已过期时返回None"""
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT fetched_at, links FROM links WHERE paper = ? AND date = ?',
+                (newspaper_type, date.isoformat())
+            ).fetchone()
+        if row is None:
+            return None
+        fetched_at, links = row
+        if date >= datetime.now().date() and time.time() - fetched_at > self.ttl:
+            return None
+        return [tuple(link) for link in json.loads(links)]
+
+    def put(self, newspaper_type, date, links):
+        if not links:
+            return
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO links (paper, date, fetched_at, links) VALUES (?, ?, ?, ?)',
+                (newspaper_type, date.isoformat(), time.time(), json.dumps(links, ensure_ascii=False))
+            )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+class DownloadEngine:
+    """下载调度核心：链接获取与并发下载流水线，log为接收进度消息的回调函数"""
+    NEWSPAPERS = NEWSPAPERS
+    
+    def __init__(self, newspaper_types, dates, download_dir, max_workers=10, engine='thread',
+                 log=print_log, session=None, merge=False, progress=None):
+        self.log = log
+        self.newspaper_types = newspaper_types
+        # 支持单个日期或日期列表，每个日期下载到 download_dir/YYYY-MM-DD
+        self.dates = list(dates) if isinstance(dates, (list, tuple)) else [dates]
+        self.download_dir = download_dir
+        self.max_workers = max_workers
+        self.discover_workers = 6  # 同时获取链接的(报纸, 日期)任务数
+        self.engine = engine  # 'thread': 线程池下载，'async': asyncio单事件循环下载
+        self.merge = merge  # 每份报纸下载完成后合并为 报纸名_YYYYMMDD.pdf
+        self.merge_workers = 2  # 同时合并的报纸数，合并时内存占用与整份报纸大小相关
+        self.timeout = 30  # 增加超时时间
+        # 流式读取块大小：每收到128KB就写入.part文件，取消或断线时已收到的数据可用于续传
+        self.chunk_size = 128 * 1024
+        
+        # 链接获取和文件下载共用连接池与按站点的自适应限流
+        # 限流器保证单个站点的并发不超过max_workers，连接池按此大小配置
+        self.session = session or create_session(pool_maxsize=max_workers, read_timeout=self.timeout)
+        self.limiter = HostLimiter(max_limit=max_workers)
+        # 取消信号由链接获取和下载共用，stop()时同时中断正在传输的响应
+        self.stop_event = threading.Event()
+        self.active_responses = set()
+        self.response_lock = threading.Lock()
+        self.downloader = NewspaperDownloader(log=self.log, limiter=self.limiter, session=self.session,
+                                              stop_event=self.stop_event)
+        self.downloader.download_folder = download_dir
+        
+        self.manifests = {}  # 日期文件夹 -> 下载清单
+        self.manifest_lock = threading.Lock()
+        self.skipped_files = []  # 清单校验后跳过的文件
+        self.verified_files = []  # 通过PDF校验的文件
+        self.suspect_files = {}  # 校验失败的文件名 -> 原因，重试成功后移除
+        self.check_xref = False  # PDF校验时是否检查startxref
+        self.use_link_cache = True  # 是否使用下载目录中的链接缓存，往期报纸可跳过链接获取
+        self.discovered = {}  # (报纸类型, 日期) -> 获取到的链接数
+        self.link_cache = None
+        self.max_attempts = 3  # 每个文件的最多下载次数（含校验失败后的重新下载）
+        self.retry_backoff = 2.0  # 重试等待秒数，每次翻倍
+        self.failed_count = 0  # 最近一次下载的失败数（含未获取到链接的报纸）
+        self.discover_failed = 0  # 最近一次下载中获取链接失败或为空的(报纸, 日期)数
+        self.completed = False  # 是否正常完成（未取消、未出错）
+        # 进度回调以节流后的ProgressSnapshot调用，不经过log
+        self.progress = DownloadProgress(progress)
+
+    @property
+    def is_running(self):
+        return not self.stop_event.is_set()
+
+    @contextmanager
+    def _executor(self, max_workers):
+        """线程池上下文，取消下载时不等待仍在执行的任务"""
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            yield executor
+        finally:
+            executor.shutdown(wait=self.is_running)
+
+    @contextmanager
+    def _dispatcher(self, executor):
+        """按站点分发下载任务到线程池，线程不在线程池中等待站点名额"""
+        dispatcher = HostDispatcher(executor, self.limiter, self.max_workers, self.stop_event)
+        try:
+            yield dispatcher
+        finally:
+            dispatcher.close()
+
+    def _as_completed(self, futures):
+        """按完成顺序返回future，每0.1秒检查一次取消，取消后立即结束"""
+        pending = set(futures)
+        while pending and self.is_running:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            yield from done
+
+    async def _as_completed_async(self, aws):
+        """asyncio版本的_as_completed，返回已完成的任务"""
+        pending = {asyncio.ensure_future(aw) for aw in aws}
+        while pending and self.is_running:
+            done, pending = await asyncio.wait(pending, timeout=0.1, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task
+
+    @staticmethod
+    def _parse_content_range(value):
+        """解析Content-Range头，返回(起始偏移, 文件总大小)，无法解析的部分为None"""
+        match = CONTENT_RANGE_RE.match(value or '')
+        if not match:
+            return None, None
+        start = int(match.group('start')) if match.group('start') else None
+        total = int(match.group('total')) if match.group('total') != '*' else None
+        return start, total
+
+    def _prepare_resume(self, status, headers, part_path, offset):
+        """根据响应状态决定写入方式，返回(文件打开模式, 预期总大小)；无法继续时返回(None, None)"""
+        if status == 206 and offset:
+            start, total = self._parse_content_range(headers.get('Content-Range'))
+            if start != offset:
+                # 服务器返回的区间与本地进度不一致，从头下载
+                os.remove(part_path)
+                return None, None
+            return 'ab', total
+        if status == 200:
+            # 服务器不支持Range或本地无缓存，从头写入
+            length = headers.get('Content-Length')
+            if headers.get('Content-Encoding', 'identity') != 'identity':
+                length = None  # 压缩传输时Content-Length不是文件大小
+            return 'wb', int(length) if length and length.isdigit() else None
+        if status == 416 and offset:
+            _, total = self._parse_content_range(headers.get('Content-Range'))
+            if total == offset:
+                # .part文件已完整，仅需重命名
+                return '', total
+            os.remove(part_path)
+        return None, None
+
+    def _finish_part(self, part_path, file_path, expected_size):
+        """校验.part文件（大小、PDF文件头尾）并原子重命名为最终文件"""
+        filename = os.path.basename(file_path)
+        size = os.path.getsize(part_path)
+        if size == 0:
+            os.remove(part_path)  # 删除空文件
+            return False
+        valid, reason = validate_pdf(part_path, expected_size, self.check_xref)
+        if not valid:
+            self.suspect_files[filename] = reason
+            self.log(f"{filename} 校验失败: {reason}")
+            if expected_size is None or size >= expected_size:
+                # 内容无效（如HTML错误页面），续传无意义，删除后重新下载
+                os.remove(part_path)
+            # 否则数据不完整，保留.part文件以便续传
+            return False
+        self.suspect_files.pop(filename, None)
+        self.verified_files.append(filename)
+        os.replace(part_path, file_path)
+        return True
+
+    def _get_manifest(self, folder):
+        """获取日期文件夹对应的下载清单"""
+        with self.manifest_lock:
+            if folder not in self.manifests:
+                self.manifests[folder] = DownloadManifest(folder)
+            return self.manifests[folder]
+
+    def _job_folder(self, date):
+        """获取并创建日期对应的下载文件夹"""
+        folder = os.path.join(self.download_dir, date.strftime("%Y-%m-%d"))
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+    def _plan_request(self, manifest, filename, url, part_path):
+        """下载前查询清单，返回(是否跳过, 请求头, 续传偏移, 清单记录)"""
+        entry = manifest.get(filename, url)
+        if entry:
+            headers = manifest.conditional_headers(entry)
+            if not headers:
+                # 没有校验信息时以清单中的大小为准，往期报纸内容不会变化
+                return True, None, 0, entry
+            return False, headers, 0, entry
+
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else None
+        return False, headers, offset, None
+
+    def _is_unchanged(self, status, headers, entry, file_path):
+        """判断服务器上的文件与本地文件是否一致，一致则无需下载"""
+        if status == 304:
+            return True
+        if status != 200:
+            return False
+
+        length = headers.get('Content-Length')
+        if not length or not length.isdigit():
+            return False
+        if entry is None:
+            # 旧版本下载的文件没有清单记录，大小一致时直接登记
+            return os.path.exists(file_path) and int(length) == os.path.getsize(file_path)
+        # 服务器忽略条件请求时，比较校验信息和大小
+        validators_match = (
+            (entry.get('etag') and headers.get('ETag') == entry['etag']) or
+            (entry.get('last_modified') and headers.get('Last-Modified') == entry['last_modified'])
+        )
+        return bool(validators_match) and int(length) == entry['size']
+
+    def _skip_file(self, manifest, filename, url, headers, entry):
+        """跳过已下载的文件，必要时补登记清单"""
+        if entry is None:
+            manifest.record(filename, url, headers)
+        self.skipped_files.append(filename)
+        self.progress.finish_file(filename, True, skipped=True)
+        return True, filename
+
+    def _limiter_outcome(self, status, headers, start):
+        """根据响应构建限流器的反馈参数"""
+        return {
+            'status': status,
+            'latency': time.monotonic() - start,
+            'retry_after': self.limiter.retry_after(headers),
+        }
+
+    def download_file(self, url, filename, folder=None, host=None):
+        """支持断点续传的文件下载方法，数据先写入.part文件，完成后原子重命名
+
+        host为分发器已为本次请求占用的站点名额，为None时在此等待名额。
+        """
+        outcome = {}  # 未发出请求时释放名额不调整限流参数
+        try:
+            if not self.is_running:
+                return False, filename
+            folder = folder or self.download_dir
+            manifest = self._get_manifest(folder)
+            file_path = os.path.join(folder, filename)
+            part_path = file_path + PART_SUFFIX
+            skip, headers, offset, entry = self._plan_request(manifest, filename, url, part_path)
+            if skip:
+                return self._skip_file(manifest, filename, url, {}, entry)
+
+            if host is None:
+                host = self.limiter.acquire(url, self.stop_event)
+                if host is None:
+                    return False, filename
+            outcome = {'error': True}  # 未收到响应时视为连接错误
+            response = None
+            try:
+                if not self.is_running:
+                    outcome = {}
+                    return False, filename
+                start = time.monotonic()
+                response = self.session.get(
+                    url,
+                    stream=True,
+                    verify=False,
+                    headers=headers
+                )
+                outcome = self._limiter_outcome(response.status_code, response.headers, start)
+                # 登记正在传输的响应，取消时由stop()关闭其socket
+                with self.response_lock:
+                    self.active_responses.add(response)
+                if not self.is_running:
+                    return False, filename
+
+                with response:
+                    if self._is_unchanged(response.status_code, response.headers, entry, file_path):
+                        return self._skip_file(manifest, filename, url, response.headers, entry)
+
+                    mode, expected_size = self._prepare_resume(
+                        response.status_code, response.headers, part_path, offset
+                    )
+                    if mode is None:
+                        return False, filename
+
+                    self.progress.start_file(filename, offset if mode != 'wb' else 0, expected_size)
+                    if mode:
+                        # 使用with确保文件正确关闭
+                        with open(part_path, mode) as f:
+                            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                                if not self.is_running:
+                                    return False, filename
+                                if chunk:
+                                    f.write(chunk)
+                                    self.progress.advance(filename, len(chunk))
+
+                if not self._finish_part(part_path, file_path, expected_size):
+                    return False, filename
+            except requests.RequestException:
+                if not self.is_running:
+                    return False, filename  # 取消时socket被关闭，不计为站点错误
+                outcome = {'error': True}
+                raise
+            finally:
+                if response is not None:
+                    with self.response_lock:
+                        self.active_responses.discard(response)
+            manifest.record(filename, url, response.headers)
+            return True, filename
+            
+        except Exception as e:
+            if self.is_running:
+                self.log(f"下载出错: {str(e)}")
+            return False, filename
+        finally:
+            if host is not None:
+                self.limiter.release(host, **outcome)
+
+    def _retry_delay(self, filename, attempt):
+        """记录重试日志并返回等待秒数，attempt为已失败的次数"""
+        delay = self.retry_backoff * 2 ** (attempt - 1)
+        self.log(f"{filename} 下载失败，{delay:g} 秒后重试（第 {attempt + 1}/{self.max_attempts} 次）")
+        return delay
+
+    def _download_task(self, dispatcher, result, url, filename, folder, attempt, host):
+        """在线程池中下载一次，失败或校验不通过时按指数退避重新排队，不占用线程等待
+
+        result为该文件的future，最后一次下载结束后设置为(是否成功, 文件名)。
+        """
+        try:
+            success, filename = self.download_file(url, filename, folder, host)
+            if success or attempt >= self.max_attempts or not self.is_running:
+                result.set_result((success, filename))
+                return
+            retry = partial(self._download_task, dispatcher, result, url, filename, folder, attempt + 1)
+            dispatcher.put(url, retry, delay=self._retry_delay(filename, attempt))
+        except InvalidStateError:
+            pass  # 取消下载时future已被取消
+        except Exception as e:
+            if not result.done():
+                result.set_exception(e)
+
+    def _submit_downloads(self, dispatcher, files_to_download, folder=None):
+        """将下载任务交给按站点的分发器，返回(future列表, 提交失败数)"""
+        futures = []
+        failed = 0
+        self.progress.add_files(len(files_to_download))
+        for file_info in files_to_download:
+            if not self.is_running:
+                break
+            try:
+                url = file_info[1]
+                filename = f"{file_info[0]}.pdf"
+                result = Future()
+                dispatcher.put(url, partial(self._download_task, dispatcher, result, url, filename, folder, 1))
+                futures.append(result)
+            except Exception as e:
+                self.log(f"创建下载任务失败: {str(e)}")
+                failed += 1
+        return futures, failed
+
+    def _wait_downloads(self, futures, on_done=None):
+        """等待下载任务完成，返回失败数；用户取消时返回None
+
+        on_done在每个任务完成后以future为参数调用
+        """
+        failed = 0
+        for future in self._as_completed(futures):
+            try:
+                success, filename = future.result()
+                self.progress.finish_file(filename, success)
+                if not success:
+                    failed += 1
+            except Exception as e:
+                failed += 1
+                self.log(f"下载任务异常: {str(e)}")
+            if on_done:
+                on_done(future)
+
+        if not self.is_running:
+            self.log("用户取消下载")
+            # 取消所有未开始的任务
+            for f in futures:
+                f.cancel()
+            return None
+        return failed
+
+    def _report_result(self, total, failed, discover_failed=0):
+        """输出下载结果统计，discover_failed为未获取到链接的(报纸, 日期)数"""
+        self.failed_count = failed + discover_failed
+        self.discover_failed = discover_failed
+        self.progress.emit(force=True)
+        if discover_failed:
+            self.log(f"{discover_failed} 份报纸未获取到版面链接")
+        if not total:
+            return
+        if self.skipped_files:
+            self.log(f"{len(self.skipped_files)} 个文件已是最新，跳过下载")
+        if self.verified_files:
+            self.log(f"{len(self.verified_files)} 个文件通过PDF校验")
+        if self.suspect_files:
+            self.log(f"{len(self.suspect_files)} 个文件多次下载后仍未通过校验（可疑）：")
+            for filename, reason in sorted(self.suspect_files.items()):
+                self.log(f"  {filename}: {reason}")
+        if failed > 0:
+            self.log(
+                f"下载完成，共 {total} 个文件，成功 {total-failed} 个，失败 {failed} 个"
+            )
+        else:
+            self.log(f"全部 {total} 个文件下载成功")
+
+    def download_files_with_threadpool(self, files_to_download, folder=None):
+        """优化的并发下载方法"""
+        if not files_to_download or not self.is_running:
+            return
+
+        total = len(files_to_download)
+        
+        try:
+            self.log(f"开始下载 {total} 个文件...")
+            
+            with self._executor(self.max_workers) as executor, self._dispatcher(executor) as dispatcher:
+                futures, failed = self._submit_downloads(dispatcher, files_to_download, folder)
+                wait_failed = self._wait_downloads(futures)
+                if wait_failed is None:
+                    return
+
+            # 只有在正常完成时才输出最终结果
+            if self.is_running:
+                self._report_result(total, failed + wait_failed)
+
+        except Exception as e:
+            self.log(f"下载系统错误: {str(e)}")
+
+    async def _download_file_async(self, client, url, filename, folder=None):
+        """异步下载单个文件，边接收边写入.part文件，支持断点续传"""
+        import aiohttp
+
+        folder = folder or self.download_dir
+        manifest = self._get_manifest(folder)
+        file_path = os.path.join(folder, filename)
+        part_path = file_path + PART_SUFFIX
+        loop = asyncio.get_running_loop()
+        try:
+            skip, headers, offset, entry = self._plan_request(manifest, filename, url, part_path)
+            if skip:
+                return self._skip_file(manifest, filename, url, {}, entry)
+
+            host = await self.limiter.acquire_async(url, self.stop_event)
+            if host is None:
+                return False, filename
+            outcome = {'error': True}  # 未收到响应时视为连接错误
+            try:
+                if not self.is_running:
+                    outcome = {}
+                    return False, filename
+                start = time.monotonic()
+                async with client.get(url, ssl=False, headers=headers) as response:
+                    outcome = self._limiter_outcome(response.status, response.headers, start)
+                    if self._is_unchanged(response.status, response.headers, entry, file_path):
+                        # 计算校验值需要读取整个文件，放到线程池中执行
+                        return await loop.run_in_executor(
+                            None, self._skip_file, manifest, filename, url, response.headers, entry
+                        )
+
+                    mode, expected_size = self._prepare_resume(
+                        response.status, response.headers, part_path, offset
+                    )
+                    if mode is None:
+                        return False, filename
+
+                    self.progress.start_file(filename, offset if mode != 'wb' else 0, expected_size)
+                    if mode:
+                        with open(part_path, mode) as f:
+                            async for chunk in response.content.iter_chunked(self.chunk_size):
+                                if not self.is_running:
+                                    return False, filename
+                                f.write(chunk)
+                                self.progress.advance(filename, len(chunk))
+
+                if not self._finish_part(part_path, file_path, expected_size):
+                    return False, filename
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                outcome = {'error': True}
+                raise
+            except asyncio.CancelledError:
+                outcome = {}  # 用户取消，不计为站点错误
+                raise
+            finally:
+                self.limiter.release(host, **outcome)
+            await loop.run_in_executor(None, manifest.record, filename, url, response.headers)
+            return True, filename
+
+        except Exception as e:
+            if self.is_running:
+                self.log(f"下载出错: {str(e)}")
+            return False, filename
+
+    async def _download_file_with_retry_async(self, client, url, filename, folder=None):
+        """下载文件，失败或校验不通过时按指数退避重新下载，取消任务时等待随之结束"""
+        for attempt in range(1, self.max_attempts + 1):
+            success, filename = await self._download_file_async(client, url, filename, folder)
+            if success or attempt == self.max_attempts or not self.is_running:
+                return success, filename
+            await asyncio.sleep(self._retry_delay(filename, attempt))
+        return False, filename
+
+    def _create_async_client(self):
+        """创建限制连接数的aiohttp客户端"""
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(limit=self.max_workers, ssl=False)
+        timeout = aiohttp.ClientTimeout(sock_connect=self.timeout, sock_read=self.timeout)
+        return aiohttp.ClientSession(
+            headers=dict(self.session.headers),
+            connector=connector,
+            timeout=timeout
+        )
+
+    def _create_async_tasks(self, client, files_to_download, folder=None):
+        """为(标题, 链接)列表创建异步下载任务"""
+        self.progress.add_files(len(files_to_download))
+        return [
+            asyncio.ensure_future(self._download_file_with_retry_async(client, url, f"{title}.pdf", folder))
+            for title, url in files_to_download
+        ]
+
+    async def _wait_downloads_async(self, tasks):
+        """等待异步下载任务完成，返回失败数；用户取消时返回None"""
+        failed = 0
+        async for next_done in self._as_completed_async(tasks):
+            try:
+                success, filename = await next_done
+                self.progress.finish_file(filename, success)
+                if not success:
+                    failed += 1
+            except Exception as e:
+                failed += 1
+                self.log(f"下载任务异常: {str(e)}")
+
+        if not self.is_running:
+            self.log("用户取消下载")
+            # 取消任务会退出aiohttp响应上下文并关闭连接
+            for task in tasks:
+                task.cancel()
+            return None
+        return failed
+
+    async def _download_all_async(self, files_to_download, folder=None):
+        async with self._create_async_client() as client:
+            return await self._wait_downloads_async(
+                self._create_async_tasks(client, files_to_download, folder)
+            )
+
+    def download_files_async(self, files_to_download, folder=None):
+        """异步并发下载方法，参数与download_files_with_threadpool相同"""
+        if not files_to_download or not self.is_running:
+            return
+
+        total = len(files_to_download)
+        try:
+            self.log(f"开始下载 {total} 个文件...")
+            failed = asyncio.run(self._download_all_async(files_to_download, folder))
+            if failed is not None and self.is_running:
+                self._report_result(total, failed)
+        except Exception as e:
+            self.log(f"下载系统错误: {str(e)}")
+
+    def _merge_issue(self, job, links, unresolved=0):
+        """将一份报纸的所有版面按版面顺序合并为一个PDF，有版面缺失时跳过
+
+        unresolved为获取链接时未解析出PDF地址的版面数，不为0时整份报纸不完整，同样跳过。
+        """
+        newspaper_type, date = job
+        folder = self._job_folder(date)
+        name = f"{self.NEWSPAPERS[newspaper_type]}_{date.strftime('%Y%m%d')}.pdf"
+        output_path = os.path.join(folder, name)
+        page_paths = [os.path.join(folder, f"{title}.pdf") for title, _ in links]
+        try:
+            if unresolved:
+                self.log(f"{self._job_label(job)} 有 {unresolved} 个版面未获取到PDF地址，跳过合并")
+                return False
+            missing = [path for path in page_paths if not os.path.exists(path)]
+            if missing:
+                self.log(f"{self._job_label(job)} 缺少 {len(missing)} 个版面，跳过合并")
+                return False
+            if os.path.exists(output_path) and os.path.getmtime(output_path) >= max(
+                    os.path.getmtime(path) for path in page_paths):
+                self.log(f"{name} 已是最新，跳过合并")
+                return True
+            merge_pdfs(page_paths, output_path)
+            self.log(f"已合并 {name}（{len(page_paths)} 个版面）")
+            return True
+        except Exception as e:
+            self.log(f"合并{self._job_label(job)}出错: {str(e)}")
+            return False
+
+    async def _merge_after_async(self, merge_executor, tasks, job, links, unresolved=0):
+        """等待一份报纸的下载任务结束后，在线程池中合并"""
+        await asyncio.wait(tasks)
+        if self.is_running:
+            await asyncio.get_running_loop().run_in_executor(
+                merge_executor, self._merge_issue, job, links, unresolved
+            )
+
+    def _open_link_cache(self):
+        if not self.use_link_cache:
+            return
+        try:
+            os.makedirs(self.download_dir, exist_ok=True)
+            self.link_cache = LinkCache(os.path.join(self.download_dir, LinkCache.FILENAME))
+        except (OSError, sqlite3.Error) as e:
+            self.log(f"无法打开链接缓存，本次不使用缓存: {str(e)}")
+
+    def _close_link_cache(self):
+        if self.link_cache:
+            self.link_cache.close()
+            self.link_cache = None
+
+    def _discover_links(self, job):
+        """获取(报纸类型, 日期)对应的PDF链接，优先使用链接缓存
+
+        返回(链接列表, 未获取到PDF地址的版面数)，只有完整的结果才写入缓存。
+        """
+        if not self.is_running:
+            return [], 0
+        newspaper_type, date = job
+        if self.link_cache:
+            try:
+                links = self.link_cache.get(newspaper_type, date)
+            except sqlite3.Error as e:
+                self.log(f"读取链接缓存失败: {str(e)}")
+                links = None
+            if links:
+                self.log(f"{self._job_label(job)} 使用缓存的 {len(links)} 个链接")
+                self.discovered[job] = len(links)
+                return links, 0
+
+        self.log(f"开始获取{self.NEWSPAPERS[newspaper_type]} {date.strftime('%Y-%m-%d')}...")
+        links, unresolved = self.downloader.find_links(newspaper_type, date)
+        self.discovered[job] = len(links)
+        # 有版面未解析出PDF地址时不缓存，否则缺失的版面以后再也不会下载
+        if self.link_cache and self.is_running and not unresolved:
+            try:
+                self.link_cache.put(newspaper_type, date, links)
+            except sqlite3.Error as e:
+                self.log(f"写入链接缓存失败: {str(e)}")
+        return links, unresolved
+
+    def _job_label(self, job):
+        newspaper_type, date = job
+        return f"{self.NEWSPAPERS[newspaper_type]} {date.strftime('%Y-%m-%d')}"
+
+    async def _run_async(self, jobs):
+        """异步引擎的流水线调度，链接获取在线程池中执行，下载在事件循环中执行"""
+        loop = asyncio.get_running_loop()
+        total = 0
+        unresolved_total = 0
+        discover_failed = 0
+        with self._executor(min(len(jobs), self.discover_workers)) as discover_executor, \
+                self._executor(self.merge_workers) as merge_executor:
+            async with self._create_async_client() as client:
+                async def discover(job):
+                    try:
+                        links, unresolved = await loop.run_in_executor(
+                            discover_executor, self._discover_links, job
+                        )
+                    except Exception as e:
+                        self.log(f"获取{self._job_label(job)}版面出错: {str(e)}")
+                        links, unresolved = [], 0
+                    return job, links, unresolved
+
+                download_tasks = []
+                merge_tasks = []
+                async for next_done in self._as_completed_async([discover(job) for job in jobs]):
+                    job, links, unresolved = await next_done
+                    if not self.is_running:
+                        break
+                    # 未解析出PDF地址的版面计为失败文件
+                    total += unresolved
+                    unresolved_total += unresolved
+                    if not links:
+                        discover_failed += 1
+                        continue
+
+                    self.log(f"开始下载{self._job_label(job)} {len(links)} 个文件...")
+                    folder = self._job_folder(job[1])
+                    tasks = self._create_async_tasks(client, links, folder)
+                    download_tasks.extend(tasks)
+                    total += len(links)
+                    if self.merge:
+                        # 每份报纸单独等待，合并与其他报纸的下载同时进行
+                        merge_tasks.append(asyncio.ensure_future(
+                            self._merge_after_async(merge_executor, tasks, job, links, unresolved)
+                        ))
+
+                if not self.is_running:
+                    for task in download_tasks + merge_tasks:
+                        task.cancel()
+                    self.log("用户取消下载")
+                    return total, None, discover_failed
+
+                failed = await self._wait_downloads_async(download_tasks)
+                if failed is None:
+                    for task in merge_tasks:
+                        task.cancel()
+                    return total, None, discover_failed
+                await asyncio.gather(*merge_tasks, return_exceptions=True)
+                return total, failed + unresolved_total, discover_failed
+
+    def run(self):
+        """流水线调度：所有(报纸, 日期)同时获取链接，获取到的链接立即进入共享下载队列"""
+        try:
+            selected = [t for t in self.NEWSPAPERS if t in self.newspaper_types]
+            jobs = [(newspaper_type, date) for date in self.dates for newspaper_type in selected]
+            if not jobs or not self.is_running:
+                return
+            self._open_link_cache()
+
+            if self.engine == 'async':
+                if HAS_AIOHTTP:
+                    total, failed, discover_failed = asyncio.run(self._run_async(jobs))
+                    if failed is None:
+                        return
+                    if self.is_running:
+                        self._report_result(total, failed, discover_failed)
+                        self.completed = True
+                        if not self.failed_count:
+                            self.log("所有文件下载完成")
+                    return
+                self.log("未安装aiohttp，使用线程池下载")
+
+            total = 0
+            failed = 0
+            discover_failed = 0
+            discover_workers = min(len(jobs), self.discover_workers)
+            # 每份报纸剩余的下载任务数，归零后提交合并，与其他报纸的下载同时进行
+            issue_of = {}  # 下载future -> (报纸类型, 日期)
+            pending = {}  # (报纸类型, 日期) -> [剩余任务数, 链接列表, 未解析的版面数]
+
+            def on_done(future):
+                job = issue_of.get(future)
+                if job is None:
+                    return
+                pending[job][0] -= 1
+                if pending[job][0] == 0 and self.is_running:
+                    merge_executor.submit(self._merge_issue, job, *pending[job][1:])
+
+            with self._executor(self.max_workers) as download_executor, \
+                    self._dispatcher(download_executor) as dispatcher, \
+                    self._executor(discover_workers) as discover_executor, \
+                    self._executor(self.merge_workers) as merge_executor:
+                discover_futures = {
+                    discover_executor.submit(self._discover_links, job): job
+                    for job in jobs
+                }
+
+                download_futures = []
+                for future in self._as_completed(discover_futures):
+                    if not self.is_running:
+                        break
+                    job = discover_futures[future]
+                    try:
+                        links, unresolved = future.result()
+                    except Exception as e:
+                        self.log(f"获取{self._job_label(job)}版面出错: {str(e)}")
+                        links, unresolved = [], 0
+                    # 未解析出PDF地址的版面计为失败文件
+                    total += unresolved
+                    failed += unresolved
+                    if not links:
+                        discover_failed += 1
+                        continue
+
+                    self.log(f"开始下载{self._job_label(job)} {len(links)} 个文件...")
+                    folder = self._job_folder(job[1])
+                    futures, submit_failed = self._submit_downloads(dispatcher, links, folder)
+                    download_futures.extend(futures)
+                    total += len(links)
+                    failed += submit_failed
+                    if self.merge and futures:
+                        pending[job] = [len(futures), links, unresolved]
+                        issue_of.update((f, job) for f in futures)
+
+                if not self.is_running:
+                    for f in discover_futures:
+                        f.cancel()
+                    self.log("用户取消下载")
+                    return
+
+                wait_failed = self._wait_downloads(download_futures, on_done)
+                if wait_failed is None:
+                    return
+                failed += wait_failed
+
+            if self.is_running:
+                self._report_result(total, failed, discover_failed)
+                self.completed = True
+                if not self.failed_count:
+                    self.log("所有文件下载完成")
+                
+        except Exception as e:
+            self.log(f"下载出错: {str(e)}")
+        finally:
+            self._close_link_cache()
+
+    def stop(self):
+        """停止下载：中断正在传输的响应，排队中的任务和链接获取在开始前退出
+
+        run()在一秒内返回；仍在等待响应头的请求留在后台线程中直到超时，
+        其结果会被丢弃。未完成的数据只保存在.part文件中，不会留下不完整的PDF。
+        """
+        self.stop_event.set()
+        self.limiter.wake()  # 等待限流名额的线程立即退出
+        with self.response_lock:
+            responses = list(self.active_responses)
+        for response in responses:
+            abort_response(response)
+
+class DailyWatcher:
+    """定时下载服务：每天从start_time起轮询所选报纸当天的目录页，发布后立即下载
+
+    轮询使用带ETag/Last-Modified的条件请求，目录页未变化或尚未发布时按指数退避
+    拉长间隔（poll_interval到max_interval秒）；到end_time仍未发布的报纸当天不再等待。
+    create_engine为(报纸类型列表, 日期列表) -> DownloadEngine的工厂函数。
+    """
+
+    def __init__(self, newspaper_types, create_engine, start_time, end_time,
+                 poll_interval=60, max_interval=900, session=None, log=print_log, once=False):
+        self.newspaper_types = [t for t in NEWSPAPERS if t in newspaper_types]
+        self.create_engine = create_engine
+        self.start_time = start_time
+        self.end_time = end_time
+        self.poll_interval = poll_interval
+        self.max_interval = max_interval
+        self.session = session or create_session()
+        self.log = log
+        self.once = once  # 只处理当天，完成或到达截止时间后退出
+        self.stop_event = threading.Event()
+        self.engine = None  # 正在运行的下载引擎
+        self.completed = False
+        self.failed_count = 0
+
+    @property
+    def is_running(self):
+        return not self.stop_event.is_set()
+
+    def _names(self, newspaper_types):
+        return "、".join(NEWSPAPERS[t] for t in newspaper_types)
+
+    def _poll(self, newspaper_type, date, state):
+        """条件请求当天的目录页，返回目录页是否出现了新内容
+
+        state保存上次的ETag、Last-Modified和内容摘要，服务器不支持条件请求时按摘要判断。
+        """
+        url = SITE_PROFILES[newspaper_type]['index_url'].format(date=date)
+        try:
+            response = self.session.get(url, headers=DownloadManifest.conditional_headers(state),
+                                        verify=False)
+        except requests.RequestException as e:
+            self.log(f"检查{NEWSPAPERS[newspaper_type]}出错: {str(e)}")
+            return False
+        with response:
+            if response.status_code != 200:
+                return False  # 304未变化，404等表示尚未发布
+            digest = hashlib.sha256(response.content).hexdigest()
+        changed = digest != state.get('sha256')
+        state.update(etag=response.headers.get('ETag'),
+                     last_modified=response.headers.get('Last-Modified'), sha256=digest)
+        return changed
+
+    def _download(self, newspaper_types, date):
+        """下载已发布的报纸，返回全部下载成功的报纸类型"""
+        engine = self.create_engine(newspaper_types, [date])
+        self.engine = engine
+        if not self.is_running:
+            return set()
+        engine.run()
+        self.engine = None
+        if not engine.completed or engine.failed_count > engine.discover_failed:
+            return set()  # 有文件失败时全部保留，下次轮询重新下载（已下载的文件由清单跳过）
+        return {t for t in newspaper_types if engine.discovered.get((t, date))}
+
+    def run_day(self, date):
+        """轮询并下载指定日期的报纸，全部完成返回True"""
+        pending = {t: {'interval': self.poll_interval, 'next': 0.0, 'state': {}}
+                   for t in self.newspaper_types}
+        deadline = datetime.combine(date, self.end_time)
+        self.log(f"开始检查 {date.strftime('%Y-%m-%d')} 的{self._names(pending)}")
+
+        while pending and self.is_running and datetime.now() < deadline:
+            due = [t for t, poll in pending.items() if poll['next'] <= time.monotonic()]
+            ready = [t for t in due if self._poll(t, date, pending[t]['state'])]
+            if ready:
+                self.log(f"{self._names(ready)}已更新，开始下载")
+                for newspaper_type in self._download(ready, date):
+                    self.log(f"{NEWSPAPERS[newspaper_type]} {date.strftime('%Y-%m-%d')} 下载完成")
+                    del pending[newspaper_type]
+
+            for newspaper_type in due:
+                poll = pending.get(newspaper_type)
+                if poll is None:
+                    continue
+                if newspaper_type in ready:
+                    poll['state'].clear()  # 下载未完成，下次轮询时重新获取目录页
+                poll['next'] = time.monotonic() + poll['interval']
+                poll['interval'] = min(poll['interval'] * 2, self.max_interval)
+
+            if pending:
+                wait_seconds = min(poll['next'] for poll in pending.values()) - time.monotonic()
+                wait_seconds = min(wait_seconds, (deadline - datetime.now()).total_seconds())
+                self.stop_event.wait(max(0.0, wait_seconds))
+
+        if pending and self.is_running:
+            self.log(f"截止 {self.end_time.strftime('%H:%M')} {self._names(pending)}仍未发布")
+        return not pending
+
+    def run(self):
+        day = datetime.now().date()
+        while self.is_running:
+            if datetime.now() < datetime.combine(day, self.end_time):
+                start = datetime.combine(day, self.start_time)
+                if datetime.now() < start:
+                    self.log(f"等待到 {start.strftime('%Y-%m-%d %H:%M')} 开始检查")
+                    if self.stop_event.wait((start - datetime.now()).total_seconds()):
+                        break
+                try:
+                    self.completed = self.run_day(day)
+                except Exception as e:
+                    self.log(f"定时下载出错: {str(e)}")
+            elif self.once:
+                self.log(f"今天的检查时间已过（截止 {self.end_time.strftime('%H:%M')}）")
+            if self.once:
+                break
+            day += timedelta(days=1)
+
+    def stop(self):
+        self.stop_event.set()
+        engine = self.engine
+        if engine is not None:
+            engine.stop()
+
+def parse_date(value):
+    """解析YYYY-MM-DD格式的日期参数"""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日期格式应为YYYY-MM-DD: {value}")
+
+def parse_weekdays(value):
+    """解析星期参数，如 1-5 或 1,3,5（1为周一），返回从0开始的星期集合"""
+    weekdays = set()
+    try:
+        for part in value.split(','):
+            if '-' in part:
+                first, last = part.split('-', 1)
+                weekdays.update(range(int(first), int(last) + 1))
+            else:
+                weekdays.add(int(part))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"星期格式应为 1-5 或 1,3,5: {value}")
+    if not weekdays or min(weekdays) < 1 or max(weekdays) > 7:
+        raise argparse.ArgumentTypeError(f"星期取值范围为1-7: {value}")
+    return {day - 1 for day in weekdays}
+
+def parse_positive_int(value):
+    """解析大于0的整数参数"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"应为整数: {value}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"应大于0: {value}")
+    return number
+
+def parse_clock(value):
+    """解析HH:MM格式的时间参数"""
+    try:
+        return datetime.strptime(value, "%H:%M").time()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"时间格式应为HH:MM: {value}")
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m newspaper_core',
+        description='报纸PDF批量下载（命令行模式）'
+    )
+    parser.add_argument('-p', '--papers', nargs='+', choices=list(NEWSPAPERS),
+                        default=list(NEWSPAPERS), help='要下载的报纸，默认全部')
+    parser.add_argument('-d', '--date', type=parse_date,
+                        help='下载日期 YYYY-MM-DD，默认今天')
+    parser.add_argument('--start', type=parse_date, help='日期范围开始 YYYY-MM-DD')
+    parser.add_argument('--end', type=parse_date, help='日期范围结束 YYYY-MM-DD，默认今天')
+    parser.add_argument('--weekdays', type=parse_weekdays,
+                        help='日期范围内只下载指定星期，如 1-5 或 1,3,5（1为周一）')
+    parser.add_argument('-o', '--output', default=os.path.join(os.path.expanduser("~"), "Downloads"),
+                        help='下载目录，每个日期保存到其下的YYYY-MM-DD子文件夹')
+    parser.add_argument('-j', '--concurrency', type=parse_positive_int, default=10, help='并发下载数，默认10')
+    parser.add_argument('--engine', choices=['thread', 'async'], default='thread',
+                        help='下载引擎，async需要安装aiohttp')
+    parser.add_argument('--retries', type=int, default=3, help='请求失败重试次数，默认3')
+    parser.add_argument('--timeout', type=float, default=30, help='读取超时秒数，默认30')
+    parser.add_argument('--attempts', type=int, default=3,
+                        help='每个文件最多下载次数，失败或PDF校验不通过时重新下载，默认3')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='不使用链接缓存，重新获取所有版面链接')
+    parser.add_argument('--check-xref', action='store_true',
+                        help='PDF校验时同时检查startxref交叉引用表')
+    parser.add_argument('--progress', action='store_true',
+                        help='每2秒输出一次下载进度（文件数、速度、剩余时间）')
+    watch = parser.add_argument_group('定时下载', '每天从指定时间起轮询报纸是否发布，发布后立即下载')
+    watch.add_argument('--watch', action='store_true', help='以定时下载服务运行，下载当天的报纸')
+    watch.add_argument('--once', action='store_true', help='与--watch一起使用，只处理今天，适合由cron启动')
+    watch.add_argument('--at', type=parse_clock, default=parse_clock('06:00'),
+                       help='每天开始检查的时间 HH:MM，默认06:00')
+    watch.add_argument('--until', type=parse_clock, default=parse_clock('23:00'),
+                       help='每天停止等待的时间 HH:MM，默认23:00')
+    watch.add_argument('--poll-interval', type=float, default=60,
+                       help='首次轮询间隔秒数，未发布时每次翻倍，默认60')
+    watch.add_argument('--max-interval', type=float, default=900,
+                       help='最大轮询间隔秒数，默认900')
+    parser.add_argument('--merge', action='store_true',
+                        help='将每份报纸合并为 报纸名_YYYYMMDD.pdf（需要安装pypdf）')
+    return parser
+
+def run_engine(engine):
+    """在工作线程中运行下载，主线程响应Ctrl+C，返回进程退出码"""
+    worker = threading.Thread(target=engine.run, daemon=True)
+    worker.start()
+    try:
+        while worker.is_alive():
+            worker.join(0.5)
+    except KeyboardInterrupt:
+        print_log("正在取消下载...")
+        engine.stop()
+        worker.join()
+        return 130
+    return 0 if engine.completed and engine.failed_count == 0 else 1
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    today = datetime.now().date()
+    if args.watch and (args.date or args.start):
+        parser.error("--watch 只下载当天的报纸，不能与 --date/--start 同时使用")
+    if args.watch and args.at >= args.until:
+        parser.error("--at 必须早于 --until")
+    if args.start:
+        if args.date:
+            parser.error("--date 与 --start 不能同时使用")
+        dates = date_range(args.start, args.end or today, args.weekdays)
+    else:
+        dates = [args.date or today]
+    if not dates:
+        parser.error("所选范围内没有符合条件的日期")
+    if dates[-1] > today:
+        parser.error("不能选择未来的日期")
+    if args.merge and not HAS_PYPDF:
+        parser.error("--merge 需要安装pypdf: pip install pypdf")
+
+    session = create_session(pool_maxsize=args.concurrency, retries=args.retries,
+                             read_timeout=args.timeout)
+    progress = (lambda snapshot: print_log(f"进度：{snapshot}")) if args.progress else None
+
+    def create_engine(papers, dates):
+        engine = DownloadEngine(papers, dates, args.output,
+                                max_workers=args.concurrency, engine=args.engine, session=session,
+                                merge=args.merge, progress=progress)
+        engine.timeout = args.timeout
+        engine.max_attempts = max(1, args.attempts)
+        engine.check_xref = args.check_xref
+        engine.use_link_cache = not args.no_cache
+        engine.progress.interval = 2.0
+        return engine
+
+    if args.watch:
+        watcher = DailyWatcher(args.papers, create_engine, args.at, args.until,
+                               poll_interval=args.poll_interval, max_interval=args.max_interval,
+                               session=session, once=args.once)
+        return run_engine(watcher)
+    return run_engine(create_engine(args.papers, dates))
+
+if __name__ == "__main__":
+    sys.exit(main())